@@ -1,39 +1,33 @@
-import discord
-import os
-from dotenv import load_dotenv
+import time
+
+STARTED_AT = time.perf_counter()
+
+import asyncio
 import logging
-import datetime
+import os
 import platform
-from db.database import init_db
+import signal
+from dotenv import load_dotenv
 
+# Read .env once, before the modules below read their configuration on import
 load_dotenv()
-DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
-BOT_PREFIX = os.getenv("BOT_PREFIX")
-
-# Setup logger
-araminator_logger = logging.getLogger("araminator")
-araminator_logger.setLevel(logging.DEBUG)
-handler = logging.FileHandler(
-    filename=f"logs/araminator{datetime.datetime.now().strftime("%Y-%m-%dT%H-%M-%S")}.log",
-    encoding="utf-8",
-    mode="w",
-)
-handler.setFormatter(logging.Formatter("%(asctime)s :: %(levelname)-7s :: %(message)s"))
-araminator_logger.addHandler(handler)
 
+import discord
+from db.database import init_db, close_db
+from utils import http_client, metrics
+from utils.champion_catalog import champion_catalog
+from utils.guild_bans import guild_bans
+from utils.logging_setup import debug_throttle, setup_logging
+from utils.match_ingestion import match_ingestion
+from utils.pool_image import ARAM_POOL_IMAGE, pool_images
 
-discord_logger = logging.getLogger("discord")
-discord_logger.setLevel(logging.DEBUG)
-handler = logging.FileHandler(filename="discord.log", encoding="utf-8", mode="w")
-handler.setFormatter(logging.Formatter("%(asctime)s :: %(levelname)-7s :: %(message)s"))
-discord_logger.addHandler(handler)
-
+DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
+BOT_PREFIX = os.getenv("BOT_PREFIX")
 
-console = logging.StreamHandler()
-console.setLevel(logging.INFO)
-araminator_logger.addHandler(console)
+# Setup logging, records are written to file by a background thread
+log_listener = setup_logging()
 
-logger = araminator_logger
+logger = logging.getLogger("araminator")
 
 bot = discord.Bot()
 
@@ -42,20 +36,83 @@ intents.message_content = True
 intents.typing = True
 intents.members = True
 
-# initialize database
-init_db()
-
 
 EXTENSIONS = ["cogs.player_commands", "cogs.aram_commands"]
 
-# Load in all extensions (cogs)
-for extension in EXTENSIONS:
+# Seconds spent per startup phase, reported once the bot is ready
+startup_timings = {"imports": time.perf_counter() - STARTED_AT}
+
+
+async def timed_phase(name, phase):
+    """Await `phase`, recording its duration in startup_timings"""
+    start = time.perf_counter()
     try:
-        logger.debug(f"Loading extension '{extension}'.")
-        bot.load_extension(extension)
-        logger.debug(f"Extension '{extension}' loaded.")
-    except Exception as e:
-        logger.exception(e)
+        return await phase
+    finally:
+        startup_timings[name] = time.perf_counter() - start
+
+
+async def load_data():
+    """Open the database pool, then warm everything rolls read, so the first roll never waits on the database"""
+    await timed_phase("database", init_db())
+    await asyncio.gather(
+        timed_phase("champion catalog", champion_catalog.load()),
+        timed_phase("guild bans", guild_bans.load_all()),
+    )
+    if ARAM_POOL_IMAGE:
+        await timed_phase(
+            "pool image atlas", pool_images.warm(champion_catalog.snapshot().ids)
+        )
+
+
+def load_extensions():
+    """Load in all extensions (cogs)"""
+    start = time.perf_counter()
+    for extension in EXTENSIONS:
+        try:
+            logger.debug(f"Loading extension '{extension}'.")
+            bot.load_extension(extension)
+            logger.debug(f"Extension '{extension}' loaded.")
+        except Exception as e:
+            logger.exception(e)
+    startup_timings["extensions"] = time.perf_counter() - start
+
+
+async def start_up():
+    """Bootstrap the database and warm caches while the cogs and the metrics server are set up
+
+    Loading the extensions is synchronous and blocks the event loop, so only the
+    database connection requests sent before it overlap with it. The metrics server
+    starts fully concurrently with the database bootstrap.
+
+    Returns:
+        aiohttp.web.AppRunner: The metrics server, or None if disabled
+    """
+    data = asyncio.create_task(load_data())
+    try:
+        # Let load_data() run up to its first network wait, so the pool's connections
+        # are being established while the extensions are imported
+        await asyncio.sleep(0)
+        http_client.get_session()
+        load_extensions()
+        metrics_server = await timed_phase(
+            "metrics server", metrics.start_metrics_server()
+        )
+    finally:
+        # Cogs only read the database on interactions, so they can load before it's ready
+        await data
+
+    startup_timings["startup"] = time.perf_counter() - STARTED_AT
+    logger.info(
+        "Started up in %.0f ms (%s).",
+        startup_timings["startup"] * 1000,
+        ", ".join(
+            f"{phase} {seconds * 1000:.0f} ms"
+            for phase, seconds in startup_timings.items()
+            if phase != "startup"
+        ),
+    )
+    return metrics_server
 
 
 @bot.event
@@ -64,21 +121,105 @@ async def on_ready():
     logger.info(f"Logged in as: {bot.user.name}")
     logger.info(f"Python version: {platform.python_version()}")
     logger.info(f"System OS: {platform.system()} {platform.release()}")
-    logger.info("Bot is ready!")
+    logger.info(
+        f"Bot is ready! {(time.perf_counter() - STARTED_AT) * 1000:.0f} ms after start."
+    )
+
+
+# Interaction ID -> start time of the slash commands being handled
+command_start_times = {}
 
 
 @bot.event
 async def on_application_command(ctx):
     """Executed before every command. Logs command invoked, author and target guild"""
+    command_start_times[ctx.interaction.id] = time.perf_counter()
     logger.debug(
-        f"Command invoked '{ctx.command}' in guild {ctx.guild.name} (ID: {ctx.guild.id}) by {ctx.author} (ID: {ctx.author.id})"
+        "Command invoked '%s' in guild %s (ID: %s) by %s (ID: %s)",
+        ctx.command,
+        ctx.guild.name,
+        ctx.guild.id,
+        ctx.author,
+        ctx.author.id,
     )
 
 
+@bot.listen("on_application_command_completion")
+async def record_command_completion(ctx):
+    record_command_time(ctx, "ok")
+
+
+@bot.listen("on_application_command_error")
+async def record_command_error(ctx, error):
+    record_command_time(ctx, "error")
+    metrics.errors.inc("command", ctx.command.qualified_name)
+
+    # Any listener replaces py-cord's default handler, which printed the traceback.
+    # Errors handled by the command or its cog have already been reported.
+    if ctx.command.has_error_handler() or (ctx.cog and ctx.cog.has_error_handler()):
+        return
+    logger.error("Command '%s' failed", ctx.command.qualified_name, exc_info=error)
+
+
+def record_command_time(ctx, status):
+    start = command_start_times.pop(ctx.interaction.id, None)
+    if start is not None:
+        metrics.command_latency.observe(
+            time.perf_counter() - start, ctx.command.qualified_name, status
+        )
+
+
+async def main():
+    metrics_server = None
+    try:
+        metrics_server = await start_up()
+        await bot.start(DISCORD_TOKEN, reconnect=True)
+    finally:
+        if not bot.is_closed():
+            await bot.close()
+        if metrics_server is not None:
+            await metrics_server.cleanup()
+        await match_ingestion.close()
+        await http_client.close_session()
+        await close_db()
+
+
+def run():
+    """Run main() until it returns or the process is asked to stop
+
+    SIGINT and SIGTERM (e.g. a container stop) cancel main(), so its cleanup runs
+    before the process exits.
+    """
+    loop = bot.loop
+    main_task = loop.create_task(main())
+
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signal_number, main_task.cancel)
+        except NotImplementedError:
+            pass  # Windows, where Ctrl+C raises KeyboardInterrupt below instead
+
+    try:
+        loop.run_until_complete(main_task)
+    except KeyboardInterrupt:
+        main_task.cancel()
+        try:
+            loop.run_until_complete(main_task)
+        except asyncio.CancelledError:
+            pass
+    except asyncio.CancelledError:
+        pass
+    logger.info("Bot stopped.")
+
+
 # Run the bot
 try:
-    bot.run(DISCORD_TOKEN, reconnect=True)
+    run()
 except Exception as e:
     logger.error(f"Bot crashed with error: {e}")
     print("An error has occured. Check logs.")
     input("Press Enter to exit")
+finally:
+    if debug_throttle.dropped:
+        logger.info(f"Dropped {debug_throttle.dropped} DEBUG log records.")
+    log_listener.stop()
@@ -1,22 +1,41 @@
+import asyncio
+import collections
+import io
 import logging
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import option
 import os
-from dotenv import load_dotenv
-from db.database import get_db_connection
+from db.matches import fetch_match_history
+from db.players import apply_rating_changes, fetch_ratings
+from utils.champion_catalog import champion_catalog
+from utils import metrics
+from utils.champion_draw import draw_pools
+from utils.guild_bans import guild_bans
+from utils.match_ingestion import match_ingestion
+from utils.player_cache import player_cache
+from utils.pool_image import ARAM_POOL_IMAGE, pool_images
 from utils.riot_api import (
     get_puuid_from_riot_id,
     fetch_champion_tile_images,
     fetch_condensed_champion_data,
 )
-from utils.exceptions import InvalidRiotIDFormatError
+from utils.exceptions import InvalidRiotIDFormatError, SessionLimitError
+from utils.session_registry import SessionRegistry
+from utils.team_balancer import balance_teams, elo_changes
 import random
+import time
 from datetime import datetime
 import functools
 
+# Team splits within this many rating points of the most balanced one are picked from at random
+ARAM_BALANCE_TOLERANCE = int(os.getenv("ARAM_BALANCE_TOLERANCE", "0"))
+# Number of previous champion rolls of a session whose champions are left out of the next roll
+ARAM_RECENT_ROLLS_EXCLUDED = int(os.getenv("ARAM_RECENT_ROLLS_EXCLUDED", "2"))
+# Minimum seconds between two edits of an ARAM session message
+ARAM_EDIT_INTERVAL = float(os.getenv("ARAM_EDIT_INTERVAL", "1.0"))
 
-load_dotenv()
+POOL_IMAGE_FILENAME = "champion_pools.png"
 
 
 logger = logging.getLogger("araminator")
@@ -51,18 +70,22 @@ def requires_session(func):
 class ARAMCommands(commands.Cog, name="ARAM commands"):
     def __init__(self, bot):
         self.bot = bot
-        self.session_active = False
-        self.session_message = None
+        self.sessions = SessionRegistry()
+        self.evict_idle_sessions.start()
+
+    def cog_unload(self):
+        self.evict_idle_sessions.cancel()
 
     @discord.slash_command(description="Start a custom game ARAM session.")
     async def aram(self, ctx: discord.ApplicationContext):
+        view = ARAMView(self.bot, None, ctx.guild_id, ctx.channel_id)
 
-        if self.session_active:
-            await ctx.respond("An ARAM session is already active!", ephemeral=True)
+        try:
+            self.sessions.add(view)
+        except SessionLimitError as e:
+            await ctx.respond(str(e), ephemeral=True)
             return
 
-        self.session_active = True
-
         embed = discord.Embed(
             title="🏆 ARAM Session",
             description="Click the button below to join!",
@@ -73,53 +96,229 @@ class ARAMCommands(commands.Cog, name="ARAM commands"):
             name="Signed-up Players", value="No one has signed up yet!", inline=False
         )
 
-        message = await ctx.respond(embed=embed, view=ARAMView(self.bot, None))
-
-        self.session_message = await message.original_response()
+        try:
+            interaction = await ctx.respond(embed=embed, view=view)
+            message = await interaction.original_response()
+            # Edits through the interaction stop working when its token expires after
+            # 15 minutes, a channel message can be edited for the whole session
+            view.message = await ctx.channel.fetch_message(message.id)
+        except Exception:
+            self.sessions.remove(ctx.guild_id, ctx.channel_id)
+            raise
 
     @discord.slash_command(description="End a custom game ARAM session.")
     async def end_aram(self, ctx: discord.ApplicationContext):
-        if not self.session_active:
-            await ctx.respond("❌ No active ARAM session to end!", ephemeral=True)
+        view = self.sessions.remove(ctx.guild_id, ctx.channel_id)
+
+        if view is None:
+            await ctx.respond(
+                "❌ No active ARAM session to end in this channel!", ephemeral=True
+            )
             return
 
-        self.session_active = False
+        await self.close_session(view)
 
-        if self.session_message:
-            try:
-                await self.session_message.delete()
-            except discord.NotFound:
-                pass
+        await ctx.respond(
+            "🛑 The ARAM session has been **ended**.", ephemeral=False, delete_after=10
+        )
 
-        self.session_message = None
+    @discord.slash_command(
+        description="Record which team won the last game of this channel's ARAM session."
+    )
+    @option("winner", description="The team that won", choices=["Team 1", "Team 2"])
+    async def record_result(self, ctx: discord.ApplicationContext, winner: str):
+        view = self.sessions.get(ctx.guild_id, ctx.channel_id)
+
+        if view is None or not (view.team_1 and view.team_2):
+            await ctx.respond(
+                "❌ There are no rolled teams in this channel's ARAM session!",
+                ephemeral=True,
+            )
+            return
+
+        if str(ctx.author.id) not in view.signed_up_users:
+            await ctx.respond(
+                "❌ You are not in the current ARAM session.", ephemeral=True
+            )
+            return
+
+        if view.result_recorded:
+            await ctx.respond(
+                "❌ A result was already recorded for these teams, roll new teams first!",
+                ephemeral=True,
+            )
+            return
+
+        # Claimed before the first await, so a concurrent /record_result is refused too
+        view.result_recorded = True
+        team_1, team_2 = list(view.team_1), list(view.team_2)
+        try:
+            ratings = await fetch_ratings([*team_1, *team_2])
+            changes = elo_changes(
+                {discord_id: ratings[discord_id] for discord_id in team_1},
+                {discord_id: ratings[discord_id] for discord_id in team_2},
+                team_1_won=winner == "Team 1",
+            )
+            await apply_rating_changes(changes)
+        except BaseException:
+            view.result_recorded = False
+            raise
 
         await ctx.respond(
-            "🛑 The ARAM session has been **ended**.", ephemeral=False, delete_after=10
+            f"🏁 **{winner}** won! Ratings changed by ±{abs(next(iter(changes.values())))}."
+        )
+
+    @discord.slash_command(
+        description="Ban a champion from being rolled in this server."
+    )
+    @discord.default_permissions(manage_guild=True)
+    @option("champion", description="Champion name")
+    async def ban_champion(self, ctx: discord.ApplicationContext, champion: str):
+        champ = champion_catalog.find(champion)
+        if champ is None:
+            await ctx.respond(f"❌ Unknown champion **{champion}**.", ephemeral=True)
+            return
+
+        await guild_bans.add(ctx.guild_id, champ["key"])
+        await ctx.respond(f"🚫 **{champ['name']}** will no longer be rolled.")
+
+    @discord.slash_command(description="Allow a banned champion to be rolled again.")
+    @discord.default_permissions(manage_guild=True)
+    @option("champion", description="Champion name")
+    async def unban_champion(self, ctx: discord.ApplicationContext, champion: str):
+        champ = champion_catalog.find(champion)
+        if champ is None:
+            await ctx.respond(f"❌ Unknown champion **{champion}**.", ephemeral=True)
+            return
+
+        await guild_bans.remove(ctx.guild_id, champ["key"])
+        await ctx.respond(f"✅ **{champ['name']}** can be rolled again.")
+
+    @discord.slash_command(
+        description="List the champions banned from rolls in this server."
+    )
+    async def banned_champions(self, ctx: discord.ApplicationContext):
+        snapshot = champion_catalog.snapshot()
+        banned = await guild_bans.get(ctx.guild_id)
+        names = sorted(
+            snapshot.names[snapshot.positions[key]]
+            for key in banned
+            if key in snapshot.positions
         )
 
+        await ctx.respond(
+            ", ".join(names) if names else "No champions are banned.", ephemeral=True
+        )
+
+    @discord.slash_command(description="Show the custom ARAM record of a player.")
+    @option(
+        "user",
+        discord.User,
+        description="Player to show, yourself if empty",
+        required=False,
+    )
+    async def history(self, ctx: discord.ApplicationContext, user: discord.User):
+        user = user or ctx.author
+        player = await player_cache.get_player(user.id)
+        if not player:
+            await ctx.respond(f"❌ {user.mention} is not registered.", ephemeral=True)
+            return
+
+        wins, losses, recent = await fetch_match_history(player["riot_puuid"])
+        if not wins + losses:
+            await ctx.respond(
+                f"No custom ARAM games recorded for {user.mention} yet.", ephemeral=True
+            )
+            return
+
+        snapshot = champion_catalog.snapshot()
+
+        def champion_name(key):
+            index = snapshot.positions.get(key)
+            return snapshot.names[index] if index is not None else "Unknown champion"
+
+        lines = [
+            f"{'✅' if game['win'] else '❌'} {champion_name(game['champion_key'])} "
+            f"{game['kills']}/{game['deaths']}/{game['assists']} <t:{game['game_start']}:R>"
+            for game in recent
+        ]
+        await ctx.respond(
+            f"**{player['riot_game_name']}#{player['riot_game_tagline']}**: "
+            f"{wins} wins, {losses} losses\n" + "\n".join(lines),
+            ephemeral=True,
+        )
+
+    async def close_session(self, view):
+        """Stop listening to a session's buttons, queue its games for ingestion and delete its message"""
+        view.stop()
+        if view.participant_puuids:
+            match_ingestion.schedule(view.participant_puuids, since=view.started_at)
+        logger.debug(
+            f"ARAM session in guild {view.guild_id}, channel {view.channel_id} ended "
+            f"({view.edits_requested} message updates requested, {view.edits_sent} sent)."
+        )
+
+        if view.message:
+            try:
+                await view.message.delete()
+            except discord.NotFound:
+                pass
+
+    @tasks.loop(minutes=5)
+    async def evict_idle_sessions(self):
+        """End sessions nobody has interacted with for a while"""
+        for view in self.sessions.pop_idle():
+            logger.info(
+                f"Ending idle ARAM session in guild {view.guild_id}, channel {view.channel_id}."
+            )
+            try:
+                await self.close_session(view)
+            except discord.HTTPException as e:
+                logger.warning(f"Could not delete idle ARAM session message: {e}")
+
 
 class ARAMView(discord.ui.View):
-    def __init__(self, bot, message):
+    def __init__(self, bot, message, guild_id, channel_id):
         super().__init__(timeout=None)
         self.signed_up_users = {}
         self.message = message
         self.bot = bot
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.last_activity = time.monotonic()
+        self.started_at = time.time()
+        # Everyone who joined at some point, their games are ingested when the session ends
+        self.participant_puuids = set()
+        self.edits_requested = 0
+        self.edits_sent = 0
+        self._edit_pending = False
+        self._edit_task = None
+        self._last_edit = float("-inf")
         self.team_1 = {}
         self.team_2 = {}
+        # Whether a game result was recorded for the current teams
+        self.result_recorded = False
         self.team_1_champions = {}
         self.team_2_champions = {}
-
+        # Champion keys of the last rolls, excluded from the next roll
+        self.recent_rolls = collections.deque(maxlen=ARAM_RECENT_ROLLS_EXCLUDED)
+        # Rendered embed fragments are cached per section and re-rendered only when
+        # the version of their section changed (see mark_changed)
+        self._versions = collections.Counter()
+        self._fragments = {}  # section -> (version, text)
+        self._embeds = {}  # embed name -> (section versions, embed)
+        # Champion pool versions of the attached pool image, None while there is none
+        self._pool_image_stamp = None
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        """Executed before every button callback. Keeps the session from being evicted as idle."""
+        self.last_activity = time.monotonic()
+        return True
+
+    @metrics.timed(metrics.button_latency, "button", "join")
     @discord.ui.button(label="Join!", style=discord.ButtonStyle.green, row=0)
     async def join_aram(self, button, interaction: discord.Interaction):
-        db_connection = get_db_connection()
-        cursor = db_connection.cursor(dictionary=True)
-
-        cursor.execute(
-            """SELECT * FROM player WHERE discord_id = %s
-            """,
-            (interaction.user.id,),
-        )
-        player = cursor.fetchone()
+        player = await player_cache.get_player(interaction.user.id)
 
         if not player:
             await interaction.response.send_message(
@@ -143,6 +342,8 @@ class ARAMView(discord.ui.View):
             "riot_game_tagline": player["riot_game_tagline"],
             "riot_puuid": player["riot_puuid"],
         }
+        self.participant_puuids.add(player["riot_puuid"])
+        self.mark_changed("signed_up_users")
 
         await self.update_message()
 
@@ -152,6 +353,7 @@ class ARAMView(discord.ui.View):
             delete_after=3,
         )
 
+    @metrics.timed(metrics.button_latency, "button", "leave")
     @requires_session
     @discord.ui.button(label="Leave!", style=discord.ButtonStyle.red, row=0)
     async def leave_aram(self, button, interaction: discord.Interaction):
@@ -160,6 +362,7 @@ class ARAMView(discord.ui.View):
         if self.signed_up_users.pop(str(discord_id), None):
             self.team_1.pop(str(discord_id), None)
             self.team_2.pop(str(discord_id), None)
+            self.mark_changed("signed_up_users", "team_1", "team_2")
 
             await interaction.response.send_message(
                 f"🚪 You left the ARAM session.",
@@ -168,6 +371,7 @@ class ARAMView(discord.ui.View):
             )
             await self.update_message()
 
+    @metrics.timed(metrics.button_latency, "button", "roll_teams")
     @requires_session
     @discord.ui.button(
         label="Roll Teams!", style=discord.ButtonStyle.blurple, emoji="🎲", row=1
@@ -179,23 +383,33 @@ class ARAMView(discord.ui.View):
         #     )
         #     return
         await interaction.response.defer()
-        user_keys = list(self.signed_up_users.keys())
 
-        random.shuffle(user_keys)
+        # Players may leave while the ratings are fetched, so the teams are built from a copy
+        signed_up_users = dict(self.signed_up_users)
 
-        mid = len(user_keys) // 2
-        if len(user_keys) % 2 == 1:
-            if random.choice([True, False]):
-                mid += 1  # Team 1 gets the extra player
-        team_1_keys = user_keys[:mid]
-        team_2_keys = user_keys[mid:]
+        # Split on internal Elo ratings, picking randomly among equally balanced splits
+        ratings = await fetch_ratings(signed_up_users.keys())
+        team_1_keys, team_2_keys = balance_teams(
+            ratings, tolerance=ARAM_BALANCE_TOLERANCE
+        )
 
-        # Reconstruct dictionaries for the teams
-        self.team_1 = {key: self.signed_up_users[key] for key in team_1_keys}
-        self.team_2 = {key: self.signed_up_users[key] for key in team_2_keys}
+        # Reconstruct dictionaries for the teams, without players who left in the meantime
+        self.team_1 = {
+            key: signed_up_users[key]
+            for key in team_1_keys
+            if key in self.signed_up_users
+        }
+        self.team_2 = {
+            key: signed_up_users[key]
+            for key in team_2_keys
+            if key in self.signed_up_users
+        }
+        self.result_recorded = False
+        self.mark_changed("team_1", "team_2")
 
         await self.update_message()
 
+    @metrics.timed(metrics.button_latency, "button", "roll_champions")
     @requires_session
     @discord.ui.button(
         label="Roll Champions!", style=discord.ButtonStyle.blurple, emoji="🎲", row=2
@@ -210,23 +424,42 @@ class ARAMView(discord.ui.View):
             return
         await interaction.response.defer()
 
-        self.assign_champions()
+        self.assign_champions(await guild_bans.get(self.guild_id))
 
         await self.update_message()
 
-    def assign_champions(self):
-        """Assigns champions to both teams"""
+    def assign_champions(self, banned_keys=frozenset()):
+        """Assigns champions to both teams
 
+        Both pools are drawn together with the same class (tag) distribution, leaving out
+        banned champions and, as far as the catalog allows, the champions of recent rolls.
+        """
         team_size = max(len(self.team_1), len(self.team_2))
-        total_champions_needed = team_size * 4
-        champion_pool = self.get_random_champions(total_champions_needed)
+        pool_size = team_size * 2
+        snapshot = champion_catalog.snapshot()
+        excluded = champion_catalog.mask_of_keys(snapshot, banned_keys)
+
+        # Forget the oldest rolls until enough champions are left for both pools
+        recent_rolls = list(self.recent_rolls)
+        while recent_rolls:
+            recent = champion_catalog.mask_of_keys(
+                snapshot, (key for roll in recent_rolls for key in roll)
+            )
+            if (snapshot.all_mask & ~(excluded | recent)).bit_count() >= 2 * pool_size:
+                excluded |= recent
+                break
+            recent_rolls.pop(0)
 
-        random.shuffle(champion_pool)
+        pool_1, pool_2 = draw_pools(snapshot, pool_size, excluded=excluded)
+        if random.choice([True, False]):
+            pool_1, pool_2 = pool_2, pool_1
 
-        mid = len(champion_pool) // 2
-        self.team_1_champions = champion_pool[:mid]
-        self.team_2_champions = champion_pool[mid:]
+        self.team_1_champions = [champion_catalog.champion(i, snapshot) for i in pool_1]
+        self.team_2_champions = [champion_catalog.champion(i, snapshot) for i in pool_2]
+        self.recent_rolls.append(tuple(snapshot.keys[i] for i in pool_1 + pool_2))
+        self.mark_changed("team_1_champions", "team_2_champions")
 
+    @metrics.timed(metrics.button_latency, "button", "swap_team")
     @requires_session
     @discord.ui.button(
         label="Swap team",
@@ -247,6 +480,9 @@ class ARAMView(discord.ui.View):
             self.team_2.pop(discord_id, None)  # Remove from Team 2
             self.team_1[discord_id] = self.signed_up_users[discord_id]  # Move to Team 1
             new_team = "Team 1"
+        # Different teams, so a result can be recorded for them
+        self.result_recorded = False
+        self.mark_changed("team_1", "team_2")
 
         await self.update_message()
 
@@ -254,104 +490,188 @@ class ARAMView(discord.ui.View):
             f"✅ You have switched to **{new_team}**!", ephemeral=True, delete_after=3
         )
 
-    def get_random_champions(self, pool_size):
-        """Fetch random champions from the database."""
-        db_connection = get_db_connection()
-        cursor = db_connection.cursor(dictionary=True)
+    async def update_message(self):
+        """Schedules an update of the message with the current state.
 
-        cursor.execute("SELECT * FROM Champion ORDER BY RAND() LIMIT %s", (pool_size,))
-        champions = cursor.fetchall()
+        Updates are coalesced: at most one edit is sent per ARAM_EDIT_INTERVAL seconds and it
+        always renders the latest state, so a burst of clicks results in one or two edits.
+        """
+        self.edits_requested += 1
+        self._edit_pending = True
 
-        cursor.close()
-        db_connection.close()
-        return champions
+        if self._edit_task is None or self._edit_task.done():
+            self._edit_task = asyncio.create_task(self._flush_edits())
 
-    async def update_message(self):
-        embeds = []
-        """Updates the message with the current player list"""
-        signed_up_mentions = [
-            f"<@{discord_id}> ({data["riot_game_name"]})"
-            for discord_id, data in self.signed_up_users.items()
-        ]
+    async def _flush_edits(self):
+        loop = asyncio.get_running_loop()
 
-        team_1_mentions = [
-            f"<@{discord_id}> ({data["riot_game_name"]})"
-            for discord_id, data in self.team_1.items()
-        ]
-        team_2_mentions = [
-            f"<@{discord_id}> ({player_data["riot_game_name"]})"
-            for discord_id, player_data in self.team_2.items()
-        ]
+        while self._edit_pending and not self.is_finished():
+            delay = self._last_edit + ARAM_EDIT_INTERVAL - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                if self.is_finished():
+                    break
 
-        team_1_champions = [
-            f"<:{champ["id"]}:{champ["emoji_id"]}>{champ['name']}"
-            for champ in self.team_1_champions
-        ]
-        team_2_champions = [
-            f"<:{champ["id"]}:{champ["emoji_id"]}>{champ['name']}"
-            for champ in self.team_2_champions
-        ]
+            # Everything requested until now is covered by this edit
+            self._edit_pending = False
+            try:
+                stamp, attachment = await self.render_pool_image()
+                await self.message.edit(
+                    embeds=self.render_embeds(pool_image=stamp is not None),
+                    view=self,
+                    **attachment,
+                )
+                self._pool_image_stamp = stamp
+                self.edits_sent += 1
+            except discord.HTTPException as e:
+                logger.warning(f"Could not update ARAM session message: {e}")
+            self._last_edit = loop.time()
+
+    def mark_changed(self, *sections):
+        """Marks sections of the state (attribute names, e.g. "team_1") as changed, so they are re-rendered"""
+        self._versions.update(sections)
+
+    def render_fragment(self, section):
+        """Text for a section of the state, re-rendered only if the section changed since the last render"""
+        version = self._versions[section]
+        cached = self._fragments.get(section)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        if section.endswith("_champions"):
+            text = "\n".join(
+                f"<:{champ["id"]}:{champ["emoji_id"]}>{champ['name']}"
+                for champ in getattr(self, section)
+            )
+        else:
+            text = "\n".join(
+                f"<@{discord_id}> ({data["riot_game_name"]})"
+                for discord_id, data in getattr(self, section).items()
+            )
+
+        self._fragments[section] = (version, text)
+        return text
+
+    async def render_pool_image(self):
+        """Pool image attachment for the next edit, rendered only when the pools changed
+
+        Returns:
+            tuple: (champion pool versions the message will show an image of, or None,
+                message.edit() arguments replacing the attachment, empty to keep it)
+        """
+        if not ARAM_POOL_IMAGE or not (self.team_1_champions or self.team_2_champions):
+            return None, self._drop_pool_image()
+
+        stamp = (
+            self._versions["team_1_champions"],
+            self._versions["team_2_champions"],
+        )
+        if stamp == self._pool_image_stamp:
+            return stamp, {}
+
+        try:
+            image = await pool_images.render(
+                champion_catalog.snapshot().ids,
+                [champ["id"] for champ in self.team_1_champions],
+                [champ["id"] for champ in self.team_2_champions],
+            )
+        except Exception:
+            # The pools are still listed as text. The image of the previous pools is
+            # dropped rather than shown as current, the next edit tries again.
+            logger.exception("Could not render champion pool image.")
+            return None, self._drop_pool_image()
+
+        file = discord.File(io.BytesIO(image), filename=POOL_IMAGE_FILENAME)
+        return stamp, {"file": file, "attachments": []}
+
+    def _drop_pool_image(self):
+        """message.edit() arguments removing the attached pool image, if there is one"""
+        return {"attachments": []} if self._pool_image_stamp is not None else {}
+
+    def render_embeds(self, pool_image=False):
+        """Builds the embeds showing the current player list, teams and champion pools"""
+        embed = self._cached_embed(
+            "session", ("signed_up_users",), self._build_session_embed
+        )
+        embed.timestamp = datetime.now()
+        embeds = [embed]
+
+        if self.team_1:
+            embeds.append(
+                self._cached_embed(
+                    "team_1",
+                    ("team_1", "team_1_champions"),
+                    lambda: self._build_team_embed("Team 1", "team_1"),
+                )
+            )
+        # embed.add_field(name="\u200B", value="\u200B", inline=False)  # Spacer
+
+        if self.team_2:
+            embeds.append(
+                self._cached_embed(
+                    "team_2",
+                    ("team_2", "team_2_champions"),
+                    lambda: self._build_team_embed("Team 2", "team_2"),
+                )
+            )
+
+        if pool_image:
+            embeds.append(
+                self._cached_embed("pool_image", (), self._build_pool_image_embed)
+            )
+
+        return embeds
+
+    def _cached_embed(self, name, sections, build):
+        """Embed built from `sections`, reused as long as none of them changed"""
+        stamp = tuple(self._versions[section] for section in sections)
+        cached = self._embeds.get(name)
+        if cached is None or cached[0] != stamp:
+            cached = (stamp, build())
+            self._embeds[name] = cached
+        return cached[1]
+
+    def _build_session_embed(self):
+        signed_up_mentions = self.render_fragment("signed_up_users")
 
         embed = discord.Embed(
             title="🏆 ARAM Session",
             color=discord.Color.blue(),
-            timestamp=datetime.now(),
         )
         embed.add_field(
             name="Signed-up Players",
             value=(
-                "\n".join(signed_up_mentions)
+                signed_up_mentions
                 if signed_up_mentions
                 else "No one has signed up yet!"
             ),
             inline=False,
         )
-        embeds.append(embed)
+        return embed
 
-        if self.team_1:
-            embed = discord.Embed(
-                title="Team 1",
-                color=discord.Color.blue(),
-            )
-            embed.add_field(
-                name="Players",
-                value=("\n".join(team_1_mentions)),
-                inline=True,
-            )
-            embed.add_field(
-                name="Champion Pool",
-                value=(
-                    "\n".join(team_1_champions)
-                    if team_1_champions
-                    else "No champions assigned."
-                ),
-                inline=True,
-            )
-            embeds.append(embed)
-        # embed.add_field(name="\u200B", value="\u200B", inline=False)  # Spacer
+    def _build_team_embed(self, title, team):
+        champions = self.render_fragment(f"{team}_champions")
 
-        if self.team_2:
-            embed = discord.Embed(
-                title="Team 2",
-                color=discord.Color.blue(),
-            )
-            embed.add_field(
-                name="Players",
-                value=("\n".join(team_2_mentions)),
-                inline=True,
-            )
-            embed.add_field(
-                name="Champion Pool",
-                value=(
-                    "\n".join(team_2_champions)
-                    if team_2_champions
-                    else "No champions assigned."
-                ),
-                inline=True,
-            )
-            embeds.append(embed)
+        embed = discord.Embed(
+            title=title,
+            color=discord.Color.blue(),
+        )
+        embed.add_field(
+            name="Players",
+            value=self.render_fragment(team),
+            inline=True,
+        )
+        embed.add_field(
+            name="Champion Pool",
+            value=(champions if champions else "No champions assigned."),
+            inline=True,
+        )
+        return embed
 
-        await self.message.edit(embeds=embeds, view=self)
+    def _build_pool_image_embed(self):
+        embed = discord.Embed(title="Champion Pools", color=discord.Color.blue())
+        embed.set_image(url=f"attachment://{POOL_IMAGE_FILENAME}")
+        return embed
 
 
 def setup(bot):
@@ -1,19 +1,37 @@
+import collections
+import io
 import logging
+import math
+import re
+import string
 import discord
 from discord.ext import commands
 from discord import option
 import os
-from dotenv import load_dotenv
-from db.database import get_db_connection
+from db.champions import (
+    fetch_champion_page,
+    fetch_champions_by_keys,
+    sync_champions,
+)
+from db.players import save_player
+from utils.champion_catalog import champion_catalog
+from utils.player_cache import player_cache
+from utils.pool_image import pool_images
+from utils.riot_id_cache import riot_id_cache
+from utils import emoji_sync, metrics, roster_import
 from utils.riot_api import (
     get_puuid_from_riot_id,
+    fetch_champion_data,
     fetch_champion_tile_images,
     fetch_condensed_champion_data,
+    fetch_latest_patch,
 )
-from utils.exceptions import InvalidRiotIDFormatError
-
+from utils.exceptions import InvalidRiotIDFormatError, RiotAccountTakenError
 
-load_dotenv()
+# Label combinations listed per metric in /stats
+STATS_SERIES_SHOWN = 8
+# Champions per /display_champions page
+CHAMPION_PAGE_SIZE = 20
 
 
 logger = logging.getLogger("araminator")
@@ -37,7 +55,7 @@ class PlayerCommands(commands.Cog, name="Player commands"):
         self, ctx: discord.ApplicationContext, riot_id: str, region: str
     ):
         try:
-            account_details = get_puuid_from_riot_id(riot_id, region)
+            account_details = await get_puuid_from_riot_id(riot_id, region)
         except InvalidRiotIDFormatError as e:
             await ctx.respond(str(e), ephemeral=True)
             return
@@ -53,39 +71,80 @@ class PlayerCommands(commands.Cog, name="Player commands"):
         riot_tag_line = account_details["tagLine"]
         riot_puuid = account_details["puuid"]
 
-        db_connection = get_db_connection()
-        cursor = db_connection.cursor()
-
         discord_id = str(ctx.author.id)
-        cursor.execute(f"SELECT * FROM player WHERE discord_id = {discord_id}")
-        existing_player = cursor.fetchone()
+        existing_player = await player_cache.get_player(discord_id)
 
-        if existing_player:
-            cursor.execute(
-                """
-                UPDATE player 
-                SET riot_game_name = %s, riot_game_tagline = %s, riot_puuid = %s
-                WHERE discord_id = %s
-                """,
-                (discord_id, riot_game_name, riot_tag_line, riot_puuid),
+        try:
+            player = await save_player(
+                discord_id, riot_game_name, riot_tag_line, riot_puuid
             )
+        except RiotAccountTakenError as e:
+            await ctx.respond(str(e), ephemeral=True)
+            return
+        # Only cached once the row is committed
+        player_cache.set(discord_id, player)
+
+        if existing_player:
             await ctx.respond(
                 f"You were already registered, but I updated your information! {ctx.author.mention} registered as **{riot_game_name}#{riot_tag_line}**",
                 ephemeral=True,
             )
         else:
-            cursor.execute(
-                "INSERT INTO player (discord_id, riot_game_name, riot_game_tagline, riot_puuid) VALUES (%s, %s, %s, %s)",
-                (discord_id, riot_game_name, riot_tag_line, riot_puuid),
-            )
-            db_connection.commit()
             await ctx.respond(
                 f"✅ {ctx.author.mention} registered as **{riot_game_name}#{riot_tag_line}**!",
                 ephemeral=True,
             )
 
-        cursor.close()
-        db_connection.close()
+    @discord.slash_command(
+        description="Register many players from a CSV roster of discord_id,riot_id[,region] lines"
+    )
+    @option(
+        "roster_file",
+        discord.Attachment,
+        description="CSV file with one discord_id,riot_id[,region] per line",
+        required=False,
+    )
+    @option(
+        "roster",
+        description="Roster pasted as text, discord_id,riot_id[,region] entries separated by spaces",
+        required=False,
+    )
+    @option(
+        "region",
+        description="Region for entries without one",
+        choices=["europe", "americas", "asia", "esports"],
+        default="europe",
+    )
+    @commands.is_owner()
+    async def import_roster(
+        self,
+        ctx: discord.ApplicationContext,
+        roster_file: discord.Attachment,
+        roster: str,
+        region: str,
+    ):
+        if roster_file is not None:
+            text = (await roster_file.read()).decode("utf-8-sig")
+        elif roster:
+            # Slash command text options are single line, so start a new entry at every Discord ID
+            text = "\n".join(re.split(r"\s+(?=\d+[,;])", roster.strip()))
+        else:
+            await ctx.respond("Attach a roster file or paste a roster.", ephemeral=True)
+            return
+
+        await ctx.defer(ephemeral=True)
+        rows = await roster_import.import_roster(text, region)
+
+        statuses = collections.Counter(row["status"] for row in rows)
+        await ctx.respond(
+            f"Roster imported, {len(rows)} entries: "
+            + ", ".join(f"{count} {status}" for status, count in statuses.items()),
+            file=discord.File(
+                io.BytesIO(roster_import.format_report(rows).encode()),
+                filename="roster_report.csv",
+            ),
+            ephemeral=True,
+        )
 
     @discord.slash_command(
         description="Making sure champion data and images are synced and up-to-date."
@@ -93,62 +152,234 @@ class PlayerCommands(commands.Cog, name="Player commands"):
     @commands.is_owner()
     async def sync_champion_data(self, ctx: discord.ApplicationContext):
         await ctx.defer()
+        patch = await fetch_latest_patch()
+        champion_data = await fetch_champion_data(patch)
+
         # Download champion square/tile images
-        fetch_champion_tile_images()
-
-        db_connection = get_db_connection()
-        cursor = db_connection.cursor()
-
-        # Create table if it doesn't exist
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS Champion(
-                `key` INT PRIMARY KEY,
-                id VARCHAR(50) UNIQUE NOT NULL, 
-                name VARCHAR(50) UNIQUE NOT NULL,
-                sprite VARCHAR(60),
-                emoji_id UNSIGNED BIGINT UNQIUE
-            )
-            """
+        tile_summary = await fetch_champion_tile_images(patch, champion_data)
+        pool_images.invalidate()
+
+        champions = await fetch_condensed_champion_data(champion_data)
+        report = await sync_champions(champions)
+
+        # Rolls are drawn from the in-memory catalog, so pick up the new data
+        await champion_catalog.load()
+
+        # List names only for small changes (e.g. a new champion), a first sync inserts every champion
+        changes = "\n".join(
+            f"{change.capitalize()}: {len(names)}"
+            + (f" ({', '.join(names)})" if 0 < len(names) <= 10 else "")
+            for change, names in report.items()
+        )
+        await ctx.respond(
+            f"Champion data synced for patch {patch}.\n{changes}\nTiles: "
+            + ", ".join(f"{count} {status}" for status, count in tile_summary.items()),
+            ephemeral=True,
+        )
+
+    @discord.slash_command(
+        description="Upload missing or changed champion tiles as application emojis"
+    )
+    @commands.is_owner()
+    async def sync_champion_emojis(self, ctx: discord.ApplicationContext):
+        await ctx.defer(ephemeral=True)
+        summary = await emoji_sync.sync_emojis(self.bot)
+
+        # Rolls render emojis from the in-memory catalog
+        await champion_catalog.load()
+
+        await ctx.respond(
+            "Champion emojis synced.\n"
+            + "\n".join(
+                f"{outcome.replace('_', ' ').capitalize()}: {len(ids)}"
+                + (
+                    f" ({', '.join(ids)})"
+                    if outcome != "unchanged" and len(ids) <= 10
+                    else ""
+                )
+                for outcome, ids in summary.items()
+            ),
+            ephemeral=True,
         )
 
-        champions = fetch_condensed_champion_data()
-
-        for champ in champions:
-            # Insert champions (update entry if existing)
-            cursor.execute(
-                """
-                INSERT INTO Champion (`key`, id, name, sprite)
-                VALUES (%s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE
-                    id = VALUES(id),
-                    name = VALUES(name),
-                    sprite = VALUES(sprite)
-                """,
-                (champ["key"], champ["id"], champ["name"], champ["sprite"]),
+    @discord.slash_command(description="Show latency and cache statistics")
+    @commands.is_owner()
+    async def stats(self, ctx: discord.ApplicationContext):
+        lines = []
+        for title, histogram in (
+            ("Commands", metrics.command_latency),
+            ("Buttons", metrics.button_latency),
+            ("Database", metrics.db_latency),
+            ("Riot API", metrics.riot_latency),
+        ):
+            # Busiest series first
+            series = sorted(
+                histogram.summary().items(), key=lambda item: -item[1]["count"]
+            )[:STATS_SERIES_SHOWN]
+            lines.append(f"{title} (count, mean, p50, p99):")
+            lines.extend(
+                f"  {' '.join(map(str, labels))}: {summary['count']}, "
+                f"{summary['mean'] * 1000:.1f} ms, <{summary['p50'] * 1000:g} ms, <{summary['p99'] * 1000:g} ms"
+                for labels, summary in series
+            )
+
+        for title, cache in (
+            ("Player cache", player_cache),
+            ("Riot ID cache", riot_id_cache),
+            ("Pool image cache", pool_images),
+        ):
+            cache_stats = cache.stats()
+            lines.append(
+                f"{title}: {cache_stats['size']} entries, {cache_stats['hits']} hits, "
+                f"{cache_stats['misses']} misses ({cache_stats['hit_rate']:.0%})"
             )
 
-        db_connection.commit()
-        cursor.close()
-        db_connection.close()
+        aram_commands = self.bot.get_cog("ARAM commands")
+        if aram_commands is not None:
+            sessions = list(aram_commands.sessions)
+            lines.append(
+                f"ARAM sessions: {len(sessions)}, "
+                f"{sum(view.edits_requested for view in sessions)} message updates requested, "
+                f"{sum(view.edits_sent for view in sessions)} sent"
+            )
 
-        await ctx.respond("Champion data synced.", ephemeral=True)
+        text = "\n".join(lines)[:1980]
+        await ctx.respond(f"```\n{text}\n```", ephemeral=True)
 
     @discord.slash_command(description="Display all champion names with their icons")
+    @option(
+        "prefix",
+        description="Only show champions whose name starts with this",
+        required=False,
+        default=None,
+    )
     @commands.is_owner()
-    async def display_champions(self, ctx: discord.ApplicationContext):
-        db_connection = get_db_connection()
-        cursor = db_connection.cursor()
+    async def display_champions(self, ctx: discord.ApplicationContext, prefix: str):
+        paginator = ChampionPaginator(ctx.author.id, prefix)
+        await ctx.respond(embed=await paginator.render(), view=paginator)
+
+
+class ChampionPaginator(discord.ui.View):
+    """Pages through the Champion table, optionally filtered by name prefix.
 
-        cursor.execute(f"SELECT * FROM champion")
-        champions = cursor.fetchall()
+    Unfiltered pages are fetched lazily with keyset pagination by key, each page
+    query starts after the last key of the previous page. A prefix filter (typed or
+    picked by letter) is resolved against the name index of the champion catalog
+    and only the page shown is fetched. Rendered pages are cached.
+    """
+
+    def __init__(self, author_id, prefix=None):
+        super().__init__(timeout=600)
+        self.author_id = author_id
+        self.page = 0
+        self._pages = {}  # (prefix, page) -> (text, has next page, champions in total)
+        self._cursors = [-1]  # Unfiltered: key the query of each page starts after
+        self._set_prefix(prefix)
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        return interaction.user.id == self.author_id
+
+    @discord.ui.button(
+        label="Previous", style=discord.ButtonStyle.gray, emoji="◀️", row=0
+    )
+    async def previous_page(self, button, interaction: discord.Interaction):
+        self.page -= 1
+        await self._show(interaction)
 
-        msg_string = ""
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.gray, emoji="▶️", row=0)
+    async def next_page(self, button, interaction: discord.Interaction):
+        self.page += 1
+        await self._show(interaction)
 
-        for champ in champions:
-            msg_string += f"{champ[2]}<:{champ[1]}:{champ[4]}>\n"
+    @discord.ui.button(label="All champions", style=discord.ButtonStyle.blurple, row=0)
+    async def clear_filter(self, button, interaction: discord.Interaction):
+        self._set_prefix(None)
+        await self._show(interaction)
+
+    @discord.ui.select(
+        placeholder="Jump to letter A-M",
+        options=[
+            discord.SelectOption(label=letter) for letter in string.ascii_uppercase[:13]
+        ],
+        row=1,
+    )
+    async def letter_a_m(
+        self, select: discord.ui.Select, interaction: discord.Interaction
+    ):
+        self._set_prefix(select.values[0])
+        await self._show(interaction)
+
+    @discord.ui.select(
+        placeholder="Jump to letter N-Z",
+        options=[
+            discord.SelectOption(label=letter) for letter in string.ascii_uppercase[13:]
+        ],
+        row=2,
+    )
+    async def letter_n_z(
+        self, select: discord.ui.Select, interaction: discord.Interaction
+    ):
+        self._set_prefix(select.values[0])
+        await self._show(interaction)
+
+    def _set_prefix(self, prefix):
+        self.prefix = (prefix or "").strip() or None
+        self.page = 0
+        # Looked up once per filter, the catalog keeps the names in memory anyway
+        self._filtered_keys = (
+            champion_catalog.keys_with_prefix(self.prefix) if self.prefix else None
+        )
+
+    async def render(self):
+        """Embed of the current page, fetched on the first visit"""
+        cache_key = (self.prefix, self.page)
+        if cache_key not in self._pages:
+            if self._filtered_keys is None:
+                champions, has_next = await self._fetch_unfiltered_page()
+                total = len(champion_catalog)
+            else:
+                start = self.page * CHAMPION_PAGE_SIZE
+                champions = await fetch_champions_by_keys(
+                    self._filtered_keys[start : start + CHAMPION_PAGE_SIZE]
+                )
+                has_next = start + CHAMPION_PAGE_SIZE < len(self._filtered_keys)
+                total = len(self._filtered_keys)
+
+            text = "\n".join(
+                f"{name}<:{champion_id}:{emoji_id}>" if emoji_id else name
+                for _, champion_id, name, emoji_id in champions
+            )
+            self._pages[cache_key] = (text, has_next, total)
+
+        text, has_next, total = self._pages[cache_key]
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = not has_next
+        self.clear_filter.disabled = self.prefix is None
+
+        embed = discord.Embed(
+            title=(
+                f"Champions starting with {self.prefix}" if self.prefix else "Champions"
+            ),
+            description=text or "No champions found.",
+            color=discord.Color.blue(),
+        )
+        embed.set_footer(
+            text=f"Page {self.page + 1}/{max(math.ceil(total / CHAMPION_PAGE_SIZE), 1)}"
+        )
+        return embed
+
+    async def _fetch_unfiltered_page(self):
+        # Pages are only reached one at a time from the first, so the cursor is known
+        rows = await fetch_champion_page(
+            self._cursors[self.page], CHAMPION_PAGE_SIZE + 1
+        )
+        champions = rows[:CHAMPION_PAGE_SIZE]
+        if champions and len(self._cursors) == self.page + 1:
+            self._cursors.append(champions[-1][0])
+        return champions, len(rows) > CHAMPION_PAGE_SIZE
 
-        await ctx.respond(msg_string[:1998])
+    async def _show(self, interaction):
+        await interaction.response.edit_message(embed=await self.render(), view=self)
 
 
 def setup(bot):
@@ -0,0 +1,181 @@
+from db.database import dialect, get_db_connection
+
+# Rows per multi-row INSERT statement
+CHAMPION_BATCH_SIZE = 100
+
+CHAMPION_UPSERT = dialect.upsert(("key",), ("id", "name", "sprite", "tags"))
+
+
+async def sync_champions(champions):
+    """Bring the Champion table in line with fresh (condensed) Data Dragon champion data.
+
+    The current table is read once and only the difference is written, in batched
+    multi-row statements inside a single transaction. `emoji_id` is never touched, so
+    uploaded emojis survive the sync.
+
+    Args:
+        champions (list[dict]): Condensed champions with key, id, name, sprite and tags
+
+    Returns:
+        dict: Names of the champions that were inserted, updated and deleted
+    """
+    fresh = {
+        int(champ["key"]): (champ["id"], champ["name"], champ["sprite"], champ["tags"])
+        for champ in champions
+    }
+
+    async with get_db_connection() as db_connection:
+        async with await db_connection.cursor() as cursor:
+            await cursor.execute("SELECT `key`, id, name, sprite, tags FROM Champion")
+            current = {row[0]: tuple(row[1:]) for row in await cursor.fetchall()}
+
+            inserted = [key for key in fresh if key not in current]
+            updated = [
+                key for key in fresh if key in current and fresh[key] != current[key]
+            ]
+            deleted = [key for key in current if key not in fresh]
+
+            # Delete first, so removed champions can't collide with the unique id/name of new ones
+            if deleted:
+                placeholders = ", ".join(["%s"] * len(deleted))
+                await cursor.execute(
+                    f"DELETE FROM Champion WHERE `key` IN ({placeholders})", deleted
+                )
+
+            changed = inserted + updated
+            for start in range(0, len(changed), CHAMPION_BATCH_SIZE):
+                batch = changed[start : start + CHAMPION_BATCH_SIZE]
+                placeholders = ", ".join(["(%s, %s, %s, %s, %s)"] * len(batch))
+                params = [value for key in batch for value in (key, *fresh[key])]
+                await cursor.execute(
+                    f"""
+                    INSERT INTO Champion (`key`, id, name, sprite, tags)
+                    VALUES {placeholders}
+                    {CHAMPION_UPSERT}
+                    """,
+                    params,
+                )
+
+        await db_connection.commit()
+
+    return {
+        "inserted": [fresh[key][1] for key in inserted],
+        "updated": [fresh[key][1] for key in updated],
+        "deleted": [current[key][1] for key in deleted],
+    }
+
+
+async def fetch_champions():
+    """Every champion as a (key, id, name, emoji_id, tags) row, ordered by name"""
+    async with get_db_connection() as db_connection:
+        async with await db_connection.cursor() as cursor:
+            await cursor.execute(
+                "SELECT `key`, id, name, emoji_id, tags FROM Champion ORDER BY name"
+            )
+            return await cursor.fetchall()
+
+
+async def fetch_champion_page(after_key, limit):
+    """Keyset page of champions: the first `limit` by key with a key greater than `after_key`
+
+    Returns:
+        list: (key, id, name, emoji_id) rows ordered by key
+    """
+    async with get_db_connection() as db_connection:
+        async with await db_connection.cursor() as cursor:
+            await cursor.execute(
+                "SELECT `key`, id, name, emoji_id FROM Champion WHERE `key` > %s ORDER BY `key` LIMIT %s",
+                (after_key, limit),
+            )
+            return await cursor.fetchall()
+
+
+async def fetch_champions_by_keys(keys):
+    """Champions with the given keys, in the order of `keys` (unknown keys are left out)
+
+    Returns:
+        list: (key, id, name, emoji_id) rows
+    """
+    keys = list(keys)
+    if not keys:
+        return []
+
+    placeholders = ", ".join(["%s"] * len(keys))
+    async with get_db_connection() as db_connection:
+        async with await db_connection.cursor() as cursor:
+            await cursor.execute(
+                f"SELECT `key`, id, name, emoji_id FROM Champion WHERE `key` IN ({placeholders})",
+                keys,
+            )
+            rows = {row[0]: row for row in await cursor.fetchall()}
+
+    return [rows[key] for key in keys if key in rows]
+
+
+async def save_emoji_ids(emoji_ids):
+    """Store the application emoji of many champions in a single transaction
+
+    Args:
+        emoji_ids (dict): Champion id -> emoji ID
+    """
+    if not emoji_ids:
+        return
+
+    async with get_db_connection() as db_connection:
+        async with await db_connection.cursor() as cursor:
+            await cursor.executemany(
+                "UPDATE Champion SET emoji_id = %s WHERE id = %s",
+                [
+                    (emoji_id, champion_id)
+                    for champion_id, emoji_id in emoji_ids.items()
+                ],
+            )
+        await db_connection.commit()
+
+
+async def fetch_guild_bans(guild_id):
+    """Keys of the champions banned from rolls in a guild"""
+    async with get_db_connection() as db_connection:
+        async with await db_connection.cursor() as cursor:
+            await cursor.execute(
+                "SELECT champion_key FROM guild_champion_ban WHERE guild_id = %s",
+                (str(guild_id),),
+            )
+            return {row[0] for row in await cursor.fetchall()}
+
+
+async def fetch_all_guild_bans():
+    """Keys of the banned champions of every guild that has bans
+
+    Returns:
+        dict: Guild ID -> set of champion keys
+    """
+    async with get_db_connection() as db_connection:
+        async with await db_connection.cursor() as cursor:
+            await cursor.execute(
+                "SELECT guild_id, champion_key FROM guild_champion_ban"
+            )
+            bans = {}
+            for guild_id, champion_key in await cursor.fetchall():
+                bans.setdefault(int(guild_id), set()).add(champion_key)
+            return bans
+
+
+async def add_guild_ban(guild_id, champion_key):
+    async with get_db_connection() as db_connection:
+        async with await db_connection.cursor() as cursor:
+            await cursor.execute(
+                f"{dialect.insert_ignore} INTO guild_champion_ban (guild_id, champion_key) VALUES (%s, %s)",
+                (str(guild_id), champion_key),
+            )
+        await db_connection.commit()
+
+
+async def remove_guild_ban(guild_id, champion_key):
+    async with get_db_connection() as db_connection:
+        async with await db_connection.cursor() as cursor:
+            await cursor.execute(
+                "DELETE FROM guild_champion_ban WHERE guild_id = %s AND champion_key = %s",
+                (str(guild_id), champion_key),
+            )
+        await db_connection.commit()
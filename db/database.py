@@ -1,56 +1,374 @@
+import asyncio
+import collections
+import functools
+import logging
 import os
-from dotenv import load_dotenv
-import mysql.connector
+import time
+from contextlib import asynccontextmanager, contextmanager
+import mysql.connector.aio
+from mysql.connector import errorcode
+from utils import metrics
+from db import migrations, sqlite
 
-load_dotenv()
+# "mysql" for a MySQL server, or "sqlite" for an embedded database file at DB_SQLITE_PATH
+DB_BACKEND = os.getenv("DB_BACKEND", "mysql").lower()
+DB_SQLITE_PATH = os.getenv("DB_SQLITE_PATH", "araminator.db")
 
 DB_HOST = os.environ.get("DB_HOST")
 DB_ROOT_USERNAME = os.getenv("DB_ROOT_USERNAME")
 DB_ROOT_PASSWORD = os.getenv("DB_ROOT_PASSWORD")
 DB_TABLE = os.getenv("DB_TABLE")
 
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+# Seconds an idle connection may sit in the pool before it is closed (down to the min size)
+DB_POOL_IDLE_TIMEOUT = float(os.getenv("DB_POOL_IDLE_TIMEOUT", "300"))
+# Connections idle for longer than this many seconds are pinged before being handed out
+DB_POOL_HEALTH_CHECK_INTERVAL = float(os.getenv("DB_POOL_HEALTH_CHECK_INTERVAL", "30"))
 
-def create_database():
+
+logger = logging.getLogger("araminator")
+
+_pool = None
+
+
+class MySQLDialect:
+    """SQL that differs between the storage backends. Queries shared by both take the
+    backend specific clauses from the module level `dialect`."""
+
+    name = "mysql"
+    insert_ignore = "INSERT IGNORE"
+    # Raised when a write violates a primary key or unique constraint
+    integrity_error = mysql.connector.IntegrityError
+
+    def upsert(self, key_columns, update_columns=(), **expressions):
+        """Clause appended to an INSERT that updates the existing row instead on a key conflict
+
+        SQLite only matches `key_columns` (which must be the primary key or a unique
+        index), MySQL matches any unique key of the table.
+
+        Args:
+            key_columns (tuple[str]): Columns of the conflicting key
+            update_columns (tuple[str]): Columns set to the inserted value
+            expressions (str): Column -> new value expression, where {new} is the inserted value
+        """
+        assignments = [
+            f"`{column}` = VALUES(`{column}`)" for column in update_columns
+        ] + [
+            f"`{column}` = {expression.format(new=f'VALUES(`{column}`)')}"
+            for column, expression in expressions.items()
+        ]
+        return f"ON DUPLICATE KEY UPDATE {', '.join(assignments)}"
+
+    async def column_exists(self, cursor, table, column):
+        await cursor.execute(
+            """
+            SELECT COUNT(*) FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+            """,
+            (table, column),
+        )
+        (count,) = await cursor.fetchone()
+        return bool(count)
+
+    async def create_index(self, cursor, table, *columns):
+        """Create an index unless the table already has one by that name"""
+        # MySQL names inline indexes after their first column, so indexes created by older
+        # versions of the schema are recognized
+        name = columns[0]
+        await cursor.execute(
+            """
+            SELECT COUNT(*) FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+            """,
+            (table, name),
+        )
+        (count,) = await cursor.fetchone()
+
+        if not count:
+            await cursor.execute(
+                f"CREATE INDEX {name} ON {table} ({', '.join(columns)})"
+            )
+
+
+dialect = sqlite.SQLiteDialect() if DB_BACKEND == "sqlite" else MySQLDialect()
+
+
+class ConnectionPool:
+    """Asyncio pool of database connections.
+
+    Keeps between `min_size` and `max_size` connections open. Idle connections are
+    handed out most-recently-used first, pinged before reuse if they have been idle
+    for a while, and closed by a background reaper once they exceed `idle_timeout`.
+    New connections are opened by awaiting `connect()`.
+    """
+
+    def __init__(
+        self,
+        connect,
+        min_size=DB_POOL_MIN_SIZE,
+        max_size=DB_POOL_MAX_SIZE,
+        idle_timeout=DB_POOL_IDLE_TIMEOUT,
+        health_check_interval=DB_POOL_HEALTH_CHECK_INTERVAL,
+    ):
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError(
+                f"Invalid pool size (min {min_size}, max {max_size}). Expected 0 <= min <= max and max >= 1."
+            )
+
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self._connect_function = connect
+
+        self._idle = collections.deque()  # (connection, last used), oldest to the left
+        self._size = 0  # Open connections, idle and checked out
+        self._condition = asyncio.Condition()
+        self._reaper = None
+        self._closed = False
+
+    async def open(self):
+        """Open the minimum number of connections and start the idle reaper"""
+        connections = await asyncio.gather(
+            *(self._connect() for _ in range(self.min_size))
+        )
+        now = time.monotonic()
+        for connection in connections:
+            self._idle.append((connection, now))
+        self._size += len(connections)
+
+        self._reaper = asyncio.create_task(self._reap_idle())
+        logger.info(
+            f"Database pool opened ({self.min_size}-{self.max_size} connections)."
+        )
+
+    async def close(self):
+        """Close every idle connection. Checked out connections are closed on release."""
+        self._closed = True
+
+        if self._reaper:
+            self._reaper.cancel()
+
+        async with self._condition:
+            while self._idle:
+                connection, _ = self._idle.popleft()
+                self._size -= 1
+                await self._close_quietly(connection)
+            self._condition.notify_all()
+
+    async def acquire(self):
+        """Check out a connection, waiting for one to be released if the pool is full"""
+        async with self._condition:
+            while not self._closed and not self._idle and self._size >= self.max_size:
+                await self._condition.wait()
+
+            if self._closed:
+                raise RuntimeError("Database pool is closed.")
+
+            if self._idle:
+                connection, last_used = self._idle.pop()
+            else:
+                # Reserve the slot before connecting so concurrent callers can't overshoot max_size
+                connection, last_used = None, None
+                self._size += 1
+
+        try:
+            if connection is None:
+                return await self._connect()
+
+            if time.monotonic() - last_used > self.health_check_interval:
+                if not await self._is_healthy(connection):
+                    logger.info("Discarding unhealthy pooled database connection.")
+                    await self._close_quietly(connection)
+                    return await self._connect()
+
+            return connection
+        except BaseException:
+            await self._discard_slot()
+            raise
+
+    async def release(self, connection):
+        """Return a connection to the pool, ending any transaction left open by the caller"""
+        try:
+            # No round trip for connections that have nothing to roll back
+            if connection.in_transaction:
+                await connection.rollback()
+        except Exception:
+            await self._close_quietly(connection)
+            await self._discard_slot()
+            return
+
+        async with self._condition:
+            if self._closed:
+                self._size -= 1
+                await self._close_quietly(connection)
+            else:
+                self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    @asynccontextmanager
+    async def connection(self):
+        """Context manager checking out a connection and releasing it afterwards"""
+        connection = await self.acquire()
+        try:
+            yield connection
+        finally:
+            await self.release(connection)
+
+    async def _connect(self):
+        return await self._connect_function()
+
+    async def _is_healthy(self, connection):
+        try:
+            return await connection.is_connected()
+        except Exception:
+            return False
+
+    async def _close_quietly(self, connection):
+        try:
+            await connection.close()
+        except Exception as e:
+            logger.debug(f"Error while closing database connection: {e}")
+
+    async def _discard_slot(self):
+        async with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    async def _reap_idle(self):
+        """Periodically close connections that have been idle longer than idle_timeout"""
+        interval = max(1.0, min(self.idle_timeout, self.health_check_interval) / 2)
+
+        while not self._closed:
+            await asyncio.sleep(interval)
+
+            expired = []
+            async with self._condition:
+                cutoff = time.monotonic() - self.idle_timeout
+                while (
+                    self._idle
+                    and self._size > self.min_size
+                    and self._idle[0][1] < cutoff
+                ):
+                    connection, _ = self._idle.popleft()
+                    self._size -= 1
+                    expired.append(connection)
+
+            for connection in expired:
+                await self._close_quietly(connection)
+
+            if expired:
+                logger.debug(f"Reaped {len(expired)} idle database connection(s).")
+
+
+class InstrumentedConnection:
+    """Connection proxy whose cursors record the duration of every statement in the metrics registry"""
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    async def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(await self._connection.cursor(*args, **kwargs))
+
+
+class InstrumentedCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    async def __aenter__(self):
+        await self._cursor.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return await self._cursor.__aexit__(*exc_info)
+
+    async def execute(self, operation, params=(), *args, **kwargs):
+        with self._timed(operation):
+            return await self._cursor.execute(operation, params, *args, **kwargs)
+
+    async def executemany(self, operation, seq_params, *args, **kwargs):
+        with self._timed(operation):
+            return await self._cursor.executemany(
+                operation, seq_params, *args, **kwargs
+            )
+
+    @contextmanager
+    def _timed(self, operation):
+        label = metrics.statement_label(operation)
+        try:
+            with metrics.db_latency.time(label):
+                yield
+        except Exception:
+            metrics.errors.inc("db", label)
+            raise
+
+
+async def create_database():
     """Connect to MySQL server and create database if missing."""
-    db_connection = mysql.connector.connect(
+    db_connection = await mysql.connector.aio.connect(
         host=DB_HOST, user=DB_ROOT_USERNAME, password=DB_ROOT_PASSWORD
     )
 
     # Create database if it doesn't exist
-    with db_connection.cursor() as cursor:
-        cursor.execute(f"CREATE DATABASE IF NOT EXISTS {DB_TABLE}")
+    async with await db_connection.cursor() as cursor:
+        await cursor.execute(f"CREATE DATABASE IF NOT EXISTS {DB_TABLE}")
 
-    db_connection.commit()
-    db_connection.close()
+    await db_connection.commit()
+    await db_connection.close()
 
 
-def get_db_connection():
-    """Connect to MySQL and return a Connection Object"""
-    create_database()  # Ensure databse exists
-    return mysql.connector.connect(
-        host=DB_HOST,
-        user=DB_ROOT_USERNAME,
-        password=DB_ROOT_PASSWORD,
-        database=DB_TABLE,
-    )
+@asynccontextmanager
+async def get_db_connection():
+    """Check out a pooled database connection. Must be used as `async with get_db_connection() as ...`"""
+    if _pool is None:
+        raise RuntimeError("Database pool is not initialized. Call init_db() first.")
 
+    async with _pool.connection() as db_connection:
+        yield InstrumentedConnection(db_connection)
 
-def init_db():
-    """Initialize database by creating tables if they do not exist"""
-    db_connection = get_db_connection()
 
-    with db_connection.cursor() as cursor:
-        # Players table
-        cursor.execute(
-            """
-        CREATE TABLE IF NOT EXISTS player (
-            discord_id VARCHAR(50) PRIMARY KEY,
-            riot_game_name VARCHAR(50) UNIQUE NOT NULL,
-            riot_game_tagline VARCHAR(50) NOT NULL,
-            riot_puuid VARCHAR(100) UNIQUE NOT NULL
-        )
-        """
+async def init_db():
+    """Initialize database by creating it, opening the connection pool and applying pending schema migrations"""
+    global _pool
+
+    if DB_BACKEND == "sqlite":
+        # The database file is created on the first connection
+        _pool = ConnectionPool(functools.partial(sqlite.connect, DB_SQLITE_PATH))
+        await _pool.open()
+    else:
+        _pool = ConnectionPool(
+            functools.partial(
+                mysql.connector.aio.connect,
+                host=DB_HOST,
+                user=DB_ROOT_USERNAME,
+                password=DB_ROOT_PASSWORD,
+                database=DB_TABLE,
+            )
         )
+        try:
+            await _pool.open()
+        except mysql.connector.Error as e:
+            # Only the very first start needs the extra connection that creates the database
+            if e.errno != errorcode.ER_BAD_DB_ERROR:
+                raise
+            await create_database()
+            await _pool.open()
+
+    async with get_db_connection() as db_connection:
+        await migrations.migrate(db_connection, dialect)
+
+
+async def close_db():
+    """Close the connection pool"""
+    global _pool
 
-    db_connection.commit()
-    db_connection.close()
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
@@ -0,0 +1,152 @@
+from db.database import get_db_connection
+
+# Rows per multi-row INSERT statement
+MATCH_BATCH_SIZE = 100
+
+MATCH_PLAYER_COLUMNS = (
+    "match_id",
+    "riot_puuid",
+    "team_id",
+    "win",
+    "champion_key",
+    "kills",
+    "deaths",
+    "assists",
+)
+
+
+async def fetch_sync_cursors(puuids):
+    """Start time (epoch seconds) up to which each player's matches have been ingested
+
+    Returns:
+        dict: PUUID -> synced_until, only for players that have been synced before
+    """
+    puuids = list(puuids)
+    if not puuids:
+        return {}
+
+    placeholders = ", ".join(["%s"] * len(puuids))
+    async with get_db_connection() as db_connection:
+        async with await db_connection.cursor() as cursor:
+            await cursor.execute(
+                f"SELECT riot_puuid, synced_until FROM match_sync_cursor WHERE riot_puuid IN ({placeholders})",
+                puuids,
+            )
+            return dict(await cursor.fetchall())
+
+
+async def fetch_known_match_ids(match_ids):
+    """The subset of `match_ids` that has already been ingested or skipped"""
+    match_ids = list(match_ids)
+    if not match_ids:
+        return set()
+
+    placeholders = ", ".join(["%s"] * len(match_ids))
+    async with get_db_connection() as db_connection:
+        async with await db_connection.cursor() as cursor:
+            await cursor.execute(
+                f"""
+                SELECT match_id FROM aram_match WHERE match_id IN ({placeholders})
+                UNION
+                SELECT match_id FROM skipped_match WHERE match_id IN ({placeholders})
+                """,
+                match_ids * 2,
+            )
+            return {row[0] for row in await cursor.fetchall()}
+
+
+async def save_matches(matches, skipped_match_ids, cursors):
+    """Store new matches and advance the players' sync cursors, in a single transaction
+
+    Args:
+        matches (list[dict]): Matches with match_id, game_start, game_duration and players,
+            a list of dicts with the MATCH_PLAYER_COLUMNS except match_id
+        skipped_match_ids (list[str]): IDs of fetched matches that aren't stored, e.g. non-ARAM games
+        cursors (dict): PUUID -> new synced_until
+    """
+    players = [
+        (match["match_id"], *(player[column] for column in MATCH_PLAYER_COLUMNS[1:]))
+        for match in matches
+        for player in match["players"]
+    ]
+
+    async with get_db_connection() as db_connection:
+        async with await db_connection.cursor() as cursor:
+            for start in range(0, len(matches), MATCH_BATCH_SIZE):
+                batch = matches[start : start + MATCH_BATCH_SIZE]
+                placeholders = ", ".join(["(%s, %s, %s)"] * len(batch))
+                await cursor.execute(
+                    f"INSERT INTO aram_match (match_id, game_start, game_duration) VALUES {placeholders}",
+                    [
+                        value
+                        for match in batch
+                        for value in (
+                            match["match_id"],
+                            match["game_start"],
+                            match["game_duration"],
+                        )
+                    ],
+                )
+
+            for start in range(0, len(skipped_match_ids), MATCH_BATCH_SIZE):
+                batch = skipped_match_ids[start : start + MATCH_BATCH_SIZE]
+                placeholders = ", ".join(["(%s)"] * len(batch))
+                await cursor.execute(
+                    f"INSERT INTO skipped_match (match_id) VALUES {placeholders}",
+                    batch,
+                )
+
+            row_placeholders = f"({', '.join(['%s'] * len(MATCH_PLAYER_COLUMNS))})"
+            for start in range(0, len(players), MATCH_BATCH_SIZE):
+                batch = players[start : start + MATCH_BATCH_SIZE]
+                await cursor.execute(
+                    f"INSERT INTO aram_match_player ({', '.join(MATCH_PLAYER_COLUMNS)}) "
+                    f"VALUES {', '.join([row_placeholders] * len(batch))}",
+                    [value for row in batch for value in row],
+                )
+
+            # Replace rather than upsert the cursors, the players' rows are all rewritten anyway
+            if cursors:
+                placeholders = ", ".join(["%s"] * len(cursors))
+                await cursor.execute(
+                    f"DELETE FROM match_sync_cursor WHERE riot_puuid IN ({placeholders})",
+                    list(cursors),
+                )
+                placeholders = ", ".join(["(%s, %s)"] * len(cursors))
+                await cursor.execute(
+                    f"INSERT INTO match_sync_cursor (riot_puuid, synced_until) VALUES {placeholders}",
+                    [value for item in cursors.items() for value in item],
+                )
+        await db_connection.commit()
+
+
+async def fetch_match_history(riot_puuid, limit=10):
+    """A player's win/loss record and most recent ingested matches
+
+    Returns:
+        tuple: (wins, losses, list of recent results as dicts with match_id, game_start,
+            win, champion_key, kills, deaths and assists)
+    """
+    async with get_db_connection() as db_connection:
+        async with await db_connection.cursor() as cursor:
+            await cursor.execute(
+                "SELECT COUNT(*), COALESCE(SUM(win), 0) FROM aram_match_player WHERE riot_puuid = %s",
+                (riot_puuid,),
+            )
+            games, wins = await cursor.fetchone()
+
+        async with await db_connection.cursor(dictionary=True) as cursor:
+            await cursor.execute(
+                """
+                SELECT m.match_id, m.game_start, p.win, p.champion_key, p.kills, p.deaths, p.assists
+                FROM aram_match_player p
+                JOIN aram_match m ON m.match_id = p.match_id
+                WHERE p.riot_puuid = %s
+                ORDER BY m.game_start DESC
+                LIMIT %s
+                """,
+                (riot_puuid, limit),
+            )
+            recent = await cursor.fetchall()
+
+    return int(wins), games - int(wins), recent
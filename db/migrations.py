@@ -0,0 +1,185 @@
+"""Versioned schema migrations, applied in order by init_db().
+
+Every migration runs once per database and is recorded in the schema_version table.
+MySQL commits DDL implicitly, so a migration that fails halfway is not rolled back.
+Migrations are therefore written to be safe to run again: IF NOT EXISTS tables,
+and column and index checks before ALTER/CREATE. This also lets databases created
+before the migrations existed adopt them without changes.
+"""
+
+import logging
+import time
+
+logger = logging.getLogger("araminator")
+
+
+async def add_column_if_missing(cursor, dialect, table, column, definition):
+    """Add a column to an existing table unless it already has it"""
+    if not await dialect.column_exists(cursor, table, column):
+        await cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+async def create_core_tables(cursor, dialect):
+    await cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS player (
+            discord_id VARCHAR(50) PRIMARY KEY,
+            riot_game_name VARCHAR(50) UNIQUE NOT NULL,
+            riot_game_tagline VARCHAR(50) NOT NULL,
+            riot_puuid VARCHAR(100) UNIQUE NOT NULL
+        )
+        """
+    )
+
+    # The unique id and emoji_id double as the indexes for lookups by those columns
+    await cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS Champion (
+            `key` INT PRIMARY KEY,
+            id VARCHAR(50) UNIQUE NOT NULL,
+            name VARCHAR(50) UNIQUE NOT NULL,
+            sprite VARCHAR(60),
+            emoji_id BIGINT UNSIGNED UNIQUE
+        )
+        """
+    )
+
+    # Internal Elo rating per player, used to balance teams
+    await cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS player_rating (
+            discord_id VARCHAR(50) PRIMARY KEY,
+            rating INT NOT NULL,
+            games INT NOT NULL DEFAULT 0
+        )
+        """
+    )
+
+    # Champions excluded from rolls per guild
+    await cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS guild_champion_ban (
+            guild_id VARCHAR(50) NOT NULL,
+            champion_key INT NOT NULL,
+            PRIMARY KEY (guild_id, champion_key)
+        )
+        """
+    )
+
+
+async def add_champion_tags(cursor, dialect):
+    await add_column_if_missing(cursor, dialect, "Champion", "tags", "VARCHAR(100)")
+
+
+async def create_riot_account(cursor, dialect):
+    # Riot ID -> PUUID resolutions, the persistent tier of the Riot ID cache
+    await cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS riot_account (
+            riot_id_key VARCHAR(120) NOT NULL,
+            region VARCHAR(20) NOT NULL,
+            puuid VARCHAR(100) NOT NULL,
+            game_name VARCHAR(50) NOT NULL,
+            tag_line VARCHAR(50) NOT NULL,
+            resolved_at BIGINT NOT NULL,
+            PRIMARY KEY (riot_id_key, region)
+        )
+        """
+    )
+    await dialect.create_index(cursor, "riot_account", "puuid")
+
+
+async def create_match_tables(cursor, dialect):
+    # Custom ARAM games played by registered players, ingested from match-v5
+    await cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS aram_match (
+            match_id VARCHAR(30) PRIMARY KEY,
+            game_start BIGINT NOT NULL,
+            game_duration INT NOT NULL
+        )
+        """
+    )
+
+    # Compact result of every participant of an ingested match
+    await cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS aram_match_player (
+            match_id VARCHAR(30) NOT NULL,
+            riot_puuid VARCHAR(100) NOT NULL,
+            team_id SMALLINT NOT NULL,
+            win BOOLEAN NOT NULL,
+            champion_key INT NOT NULL,
+            kills SMALLINT NOT NULL,
+            deaths SMALLINT NOT NULL,
+            assists SMALLINT NOT NULL,
+            PRIMARY KEY (match_id, riot_puuid)
+        )
+        """
+    )
+    await dialect.create_index(cursor, "aram_match_player", "riot_puuid")
+
+    # Per player, the start time up to which their matches have been ingested
+    await cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS match_sync_cursor (
+            riot_puuid VARCHAR(100) PRIMARY KEY,
+            synced_until BIGINT NOT NULL
+        )
+        """
+    )
+
+
+async def create_skipped_match(cursor, dialect):
+    # Custom games that aren't ARAM, remembered so match syncs don't fetch them again
+    await cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS skipped_match (
+            match_id VARCHAR(30) PRIMARY KEY
+        )
+        """
+    )
+
+
+# (version, description, migration). Append new migrations, never change applied ones.
+MIGRATIONS = (
+    (1, "Players, champions, ratings and guild bans", create_core_tables),
+    (2, "Champion tags", add_champion_tags),
+    (3, "Riot ID cache", create_riot_account),
+    (4, "ARAM match history", create_match_tables),
+    (5, "Skipped non-ARAM matches", create_skipped_match),
+)
+
+
+async def migrate(db_connection, dialect):
+    """Apply the migrations the database hasn't seen yet
+
+    Returns:
+        list[int]: Versions that were applied
+    """
+    async with await db_connection.cursor() as cursor:
+        await cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INT PRIMARY KEY,
+                description VARCHAR(100) NOT NULL,
+                applied_at BIGINT NOT NULL
+            )
+            """
+        )
+        await cursor.execute("SELECT version FROM schema_version")
+        applied = {row[0] for row in await cursor.fetchall()}
+    await db_connection.commit()
+
+    pending = [migration for migration in MIGRATIONS if migration[0] not in applied]
+    for version, description, migration in pending:
+        logger.info(f"Applying database migration {version}: {description}.")
+        async with await db_connection.cursor() as cursor:
+            await migration(cursor, dialect)
+            await cursor.execute(
+                "INSERT INTO schema_version (version, description, applied_at) VALUES (%s, %s, %s)",
+                (version, description, int(time.time())),
+            )
+        await db_connection.commit()
+
+    return [migration[0] for migration in pending]
@@ -0,0 +1,290 @@
+from db.database import dialect, get_db_connection
+from utils.exceptions import RiotAccountTakenError
+from utils.team_balancer import DEFAULT_RATING
+
+RATING_UPSERT = dialect.upsert(
+    ("discord_id",),
+    rating=f"`rating` + {{new}} - {DEFAULT_RATING}",
+    games="`games` + 1",
+)
+RIOT_ACCOUNT_UPSERT = dialect.upsert(
+    ("riot_id_key", "region"), ("puuid", "game_name", "tag_line", "resolved_at")
+)
+
+
+async def fetch_player(discord_id):
+    """Fetch a registered player by Discord ID
+
+    Returns:
+        dict: Player row, or None if the player isn't registered
+    """
+    async with get_db_connection() as db_connection:
+        async with await db_connection.cursor(dictionary=True) as cursor:
+            await cursor.execute(
+                """
+                SELECT discord_id, riot_game_name, riot_game_tagline, riot_puuid
+                FROM player WHERE discord_id = %s
+                """,
+                (str(discord_id),),
+            )
+            return await cursor.fetchone()
+
+
+async def save_player(discord_id, riot_game_name, riot_game_tagline, riot_puuid):
+    """Insert a player, or update the Riot account of an already registered one
+
+    Only the row of `discord_id` is written. An upsert would also match the unique
+    game name and PUUID, and so overwrite the row of another Discord user on MySQL.
+
+    Raises:
+        RiotAccountTakenError: The game name or account is linked to another Discord user
+
+    Returns:
+        dict: The stored player row
+    """
+    player = {
+        "discord_id": str(discord_id),
+        "riot_game_name": riot_game_name,
+        "riot_game_tagline": riot_game_tagline,
+        "riot_puuid": riot_puuid,
+    }
+
+    async with get_db_connection() as db_connection:
+        async with await db_connection.cursor() as cursor:
+            await cursor.execute(
+                "SELECT discord_id FROM player WHERE discord_id = %s",
+                (player["discord_id"],),
+            )
+            registered = await cursor.fetchone() is not None
+
+            try:
+                if registered:
+                    await cursor.execute(
+                        """
+                        UPDATE player SET riot_game_name = %s, riot_game_tagline = %s, riot_puuid = %s
+                        WHERE discord_id = %s
+                        """,
+                        (
+                            riot_game_name,
+                            riot_game_tagline,
+                            riot_puuid,
+                            player["discord_id"],
+                        ),
+                    )
+                else:
+                    await cursor.execute(
+                        """
+                        INSERT INTO player (discord_id, riot_game_name, riot_game_tagline, riot_puuid)
+                        VALUES (%s, %s, %s, %s)
+                        """,
+                        tuple(player.values()),
+                    )
+            except dialect.integrity_error as e:
+                raise RiotAccountTakenError(
+                    f"{riot_game_name}#{riot_game_tagline} is already linked to another Discord user."
+                ) from e
+        await db_connection.commit()
+
+    return player
+
+
+async def fetch_ratings(discord_ids):
+    """Fetch the internal Elo rating of players. Players without recorded games get DEFAULT_RATING.
+
+    Returns:
+        dict: Discord ID -> rating
+    """
+    discord_ids = [str(discord_id) for discord_id in discord_ids]
+    ratings = dict.fromkeys(discord_ids, DEFAULT_RATING)
+    if not discord_ids:
+        return ratings
+
+    placeholders = ", ".join(["%s"] * len(discord_ids))
+    async with get_db_connection() as db_connection:
+        async with await db_connection.cursor() as cursor:
+            await cursor.execute(
+                f"SELECT discord_id, rating FROM player_rating WHERE discord_id IN ({placeholders})",
+                discord_ids,
+            )
+            ratings.update(await cursor.fetchall())
+
+    return ratings
+
+
+async def apply_rating_changes(changes):
+    """Add rating changes from one game to the players' ratings
+
+    Args:
+        changes (dict): Discord ID -> rating change
+    """
+    if not changes:
+        return
+
+    async with get_db_connection() as db_connection:
+        async with await db_connection.cursor() as cursor:
+            # New players start at DEFAULT_RATING + change, existing ones get the change added
+            await cursor.executemany(
+                f"""
+                INSERT INTO player_rating (discord_id, rating, games)
+                VALUES (%s, %s, 1)
+                {RATING_UPSERT}
+                """,
+                [
+                    (str(discord_id), DEFAULT_RATING + change)
+                    for discord_id, change in changes.items()
+                ],
+            )
+        await db_connection.commit()
+
+
+# Rows per multi-row INSERT statement
+PLAYER_BATCH_SIZE = 100
+
+
+async def fetch_players_by_riot_accounts(riot_puuids, riot_game_names):
+    """Registered players linked to any of the given PUUIDs or game names
+
+    Returns:
+        list[dict]: Player rows with discord_id, riot_game_name and riot_puuid
+    """
+    riot_puuids = list(riot_puuids)
+    riot_game_names = list(riot_game_names)
+    if not riot_puuids and not riot_game_names:
+        return []
+
+    conditions = []
+    if riot_puuids:
+        conditions.append(f"riot_puuid IN ({', '.join(['%s'] * len(riot_puuids))})")
+    if riot_game_names:
+        conditions.append(
+            f"riot_game_name IN ({', '.join(['%s'] * len(riot_game_names))})"
+        )
+
+    async with get_db_connection() as db_connection:
+        async with await db_connection.cursor(dictionary=True) as cursor:
+            await cursor.execute(
+                f"SELECT discord_id, riot_game_name, riot_puuid FROM player WHERE {' OR '.join(conditions)}",
+                riot_puuids + riot_game_names,
+            )
+            return await cursor.fetchall()
+
+
+async def save_players(players):
+    """Insert or update many players in a single transaction
+
+    As in save_player, only the rows of the players' Discord IDs are written. Check
+    for accounts linked to other players first (see fetch_players_by_riot_accounts).
+
+    Args:
+        players (list[dict]): Player rows with discord_id, riot_game_name, riot_game_tagline and riot_puuid
+
+    Raises:
+        RiotAccountTakenError: A game name or account is linked to another Discord user,
+            nothing was written
+    """
+    async with get_db_connection() as db_connection:
+        async with await db_connection.cursor() as cursor:
+            registered = set()
+            for start in range(0, len(players), PLAYER_BATCH_SIZE):
+                batch = players[start : start + PLAYER_BATCH_SIZE]
+                placeholders = ", ".join(["%s"] * len(batch))
+                await cursor.execute(
+                    f"SELECT discord_id FROM player WHERE discord_id IN ({placeholders})",
+                    [player["discord_id"] for player in batch],
+                )
+                registered.update(row[0] for row in await cursor.fetchall())
+
+            updated = [
+                player for player in players if player["discord_id"] in registered
+            ]
+            inserted = [
+                player for player in players if player["discord_id"] not in registered
+            ]
+
+            try:
+                if updated:
+                    await cursor.executemany(
+                        """
+                        UPDATE player SET riot_game_name = %s, riot_game_tagline = %s, riot_puuid = %s
+                        WHERE discord_id = %s
+                        """,
+                        [
+                            (
+                                player["riot_game_name"],
+                                player["riot_game_tagline"],
+                                player["riot_puuid"],
+                                player["discord_id"],
+                            )
+                            for player in updated
+                        ],
+                    )
+
+                for start in range(0, len(inserted), PLAYER_BATCH_SIZE):
+                    batch = inserted[start : start + PLAYER_BATCH_SIZE]
+                    placeholders = ", ".join(["(%s, %s, %s, %s)"] * len(batch))
+                    await cursor.execute(
+                        f"""
+                        INSERT INTO player (discord_id, riot_game_name, riot_game_tagline, riot_puuid)
+                        VALUES {placeholders}
+                        """,
+                        [
+                            value
+                            for player in batch
+                            for value in (
+                                player["discord_id"],
+                                player["riot_game_name"],
+                                player["riot_game_tagline"],
+                                player["riot_puuid"],
+                            )
+                        ],
+                    )
+            except dialect.integrity_error as e:
+                raise RiotAccountTakenError(
+                    "A Riot account of the batch is already linked to another Discord user."
+                ) from e
+        await db_connection.commit()
+
+
+async def fetch_riot_account(riot_id_key, region, resolved_after):
+    """Fetch a cached Riot account by normalized Riot ID, if it was resolved after `resolved_after`
+
+    Returns:
+        dict: puuid, gameName and tagLine, or None if not cached (or expired)
+    """
+    async with get_db_connection() as db_connection:
+        async with await db_connection.cursor(dictionary=True) as cursor:
+            await cursor.execute(
+                """
+                SELECT puuid, game_name AS gameName, tag_line AS tagLine
+                FROM riot_account
+                WHERE riot_id_key = %s AND region = %s AND resolved_at > %s
+                """,
+                (riot_id_key, region, resolved_after),
+            )
+            return await cursor.fetchone()
+
+
+async def save_riot_account(riot_id_key, region, account, resolved_at):
+    """Store a resolved Riot account. Older Riot IDs of the same PUUID (renamed accounts) are dropped."""
+    async with get_db_connection() as db_connection:
+        async with await db_connection.cursor() as cursor:
+            await cursor.execute(
+                "DELETE FROM riot_account WHERE puuid = %s AND riot_id_key <> %s",
+                (account["puuid"], riot_id_key),
+            )
+            await cursor.execute(
+                f"""
+                INSERT INTO riot_account (riot_id_key, region, puuid, game_name, tag_line, resolved_at)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                {RIOT_ACCOUNT_UPSERT}
+                """,
+                (
+                    riot_id_key,
+                    region,
+                    account["puuid"],
+                    account["gameName"],
+                    account["tagLine"],
+                    resolved_at,
+                ),
+            )
+        await db_connection.commit()
@@ -0,0 +1,158 @@
+"""Embedded SQLite backend, an alternative to a MySQL server for single-node deployments and tests.
+
+The classes mimic the parts of the mysql.connector.aio API the bot uses, so queries
+written with %s placeholders run unchanged on both backends.
+"""
+
+import asyncio
+import functools
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+# Applied to every connection. WAL lets readers run alongside the single writer, and
+# with synchronous=NORMAL a commit doesn't wait for fsync (durable at checkpoints).
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA mmap_size = 134217728",
+)
+
+
+@functools.lru_cache(maxsize=256)
+def translate(operation):
+    """Statement with MySQL style %s placeholders converted to SQLite's ?"""
+    return operation.replace("%s", "?")
+
+
+async def connect(path):
+    """Open a connection to the SQLite database file at `path`, creating it if missing"""
+    # Each connection gets its own thread, sqlite3 objects are used from that thread only
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+    loop = asyncio.get_running_loop()
+
+    def open_connection():
+        connection = sqlite3.connect(path, check_same_thread=False)
+        for pragma in PRAGMAS:
+            connection.execute(pragma)
+        return connection
+
+    connection = await loop.run_in_executor(executor, open_connection)
+    return SQLiteConnection(connection, executor)
+
+
+class SQLiteConnection:
+    def __init__(self, connection, executor):
+        self._connection = connection
+        self._executor = executor
+        self._closed = False
+
+    @property
+    def in_transaction(self):
+        return self._connection.in_transaction
+
+    async def cursor(self, dictionary=False):
+        cursor = await self.run(self._connection.cursor)
+        return SQLiteCursor(self, cursor, dictionary)
+
+    async def commit(self):
+        await self.run(self._connection.commit)
+
+    async def rollback(self):
+        await self.run(self._connection.rollback)
+
+    async def is_connected(self):
+        return not self._closed
+
+    async def close(self):
+        if not self._closed:
+            self._closed = True
+            await self.run(self._connection.close)
+            self._executor.shutdown(wait=False)
+
+    async def run(self, func, *args):
+        """Run a blocking sqlite3 call on the connection's thread"""
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, func, *args
+        )
+
+
+class SQLiteCursor:
+    def __init__(self, connection, cursor, dictionary=False):
+        self._connection = connection
+        self._cursor = cursor
+        self._dictionary = dictionary
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    async def execute(self, operation, params=()):
+        await self._connection.run(
+            self._cursor.execute, translate(operation), tuple(params)
+        )
+
+    async def executemany(self, operation, seq_params):
+        await self._connection.run(
+            self._cursor.executemany,
+            translate(operation),
+            [tuple(params) for params in seq_params],
+        )
+
+    async def fetchone(self):
+        row = await self._connection.run(self._cursor.fetchone)
+        return self._row(row) if row is not None else None
+
+    async def fetchall(self):
+        rows = await self._connection.run(self._cursor.fetchall)
+        return [self._row(row) for row in rows]
+
+    async def close(self):
+        await self._connection.run(self._cursor.close)
+
+    def _row(self, row):
+        if not self._dictionary:
+            return row
+        return {
+            column[0]: value for column, value in zip(self._cursor.description, row)
+        }
+
+
+class SQLiteDialect:
+    """SQL that differs between MySQL and SQLite, see MySQLDialect in db.database"""
+
+    name = "sqlite"
+    insert_ignore = "INSERT OR IGNORE"
+    integrity_error = sqlite3.IntegrityError
+
+    def upsert(self, key_columns, update_columns=(), **expressions):
+        assignments = [
+            f"`{column}` = excluded.`{column}`" for column in update_columns
+        ] + [
+            f"`{column}` = {expression.format(new=f'excluded.`{column}`')}"
+            for column, expression in expressions.items()
+        ]
+        keys = ", ".join(f"`{column}`" for column in key_columns)
+        return f"ON CONFLICT ({keys}) DO UPDATE SET {', '.join(assignments)}"
+
+    async def column_exists(self, cursor, table, column):
+        await cursor.execute(f"PRAGMA table_info({table})")
+        return any(row[1] == column for row in await cursor.fetchall())
+
+    async def create_index(self, cursor, table, *columns):
+        await cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_{'_'.join(columns)} "
+            f"ON {table} ({', '.join(columns)})"
+        )
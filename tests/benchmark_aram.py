@@ -0,0 +1,467 @@
+"""Load simulation of ARAM sessions, without Discord, MySQL or the Riot API.
+
+ARAMCommands and ARAMView handlers are driven with fake contexts and interactions,
+the database is a temporary file on the SQLite backend and Riot/Data Dragon requests go to a
+local stub server. Latency percentiles and throughput are printed as JSON.
+
+Usage: python tests/benchmark_aram.py [--sessions 20] [--clicks-per-second 50] [--duration 10] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+STUB_HOST = "127.0.0.1"
+STUB_PORT = int(os.getenv("BENCHMARK_STUB_PORT", "8765"))
+STUB_URL = f"http://{STUB_HOST}:{STUB_PORT}"
+STUB_PATCH = "99.1.1"
+STUB_CHAMPIONS = 170
+STUB_TAGS = ("Fighter", "Mage", "Assassin", "Marksman", "Support", "Tank")
+
+# Point the bot at the stub server before its modules read their configuration
+os.environ["RIOT_API_BASE_URL"] = STUB_URL
+os.environ["DDRAGON_BASE_URL"] = STUB_URL
+os.environ.setdefault("RIOT_API_KEY", "benchmark")
+os.environ.setdefault("RIOT_APP_RATE_LIMIT", "1000:1")
+os.environ["DB_BACKEND"] = "sqlite"
+DATABASE_DIRECTORY = tempfile.TemporaryDirectory(prefix="araminator-benchmark-")
+os.environ["DB_SQLITE_PATH"] = os.path.join(DATABASE_DIRECTORY.name, "araminator.db")
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import discord
+from aiohttp import web
+from db.database import close_db, init_db
+from db.players import apply_rating_changes, save_players
+from cogs.aram_commands import ARAMCommands
+from utils import http_client
+from utils.champion_catalog import champion_catalog
+from utils.match_ingestion import MatchIngestion
+from utils.rate_limiter import Priority
+from utils.riot_api import condense_champion_data, fetch_champion_data, riot_get
+
+# Stand-in for Discord's API latency when the session message is edited
+EDIT_LATENCY = 0.05
+
+
+def percentiles(timings):
+    """p50/p99/max in milliseconds"""
+    if not timings:
+        return {"count": 0}
+    ordered = sorted(timings)
+    return {
+        "count": len(ordered),
+        "p50_ms": statistics.median(ordered) * 1000,
+        "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+# --- Stub Riot API / Data Dragon server ---
+
+
+def stub_champion_data():
+    return {
+        f"Champion{key}": {
+            "id": f"Champion{key}",
+            "key": str(key),
+            "name": f"Champion {key}",
+            "tags": [STUB_TAGS[key % len(STUB_TAGS)]],
+        }
+        for key in range(1, STUB_CHAMPIONS + 1)
+    }
+
+
+def stub_matches(players, games_per_session):
+    """Custom ARAM games in which all players of a session played together
+
+    Returns:
+        tuple: (match ID -> match, PUUID -> match IDs newest first)
+    """
+    matches = {}
+    match_ids = {}
+    for session, session_players in enumerate(players):
+        for game in range(games_per_session):
+            match_id = f"BENCH_{session}_{game}"
+            game_start = int(time.time()) - (games_per_session - game) * 1200
+            matches[match_id] = {
+                "metadata": {"matchId": match_id},
+                "info": {
+                    "gameMode": "ARAM",
+                    "gameStartTimestamp": game_start * 1000,
+                    "gameDuration": 1100,
+                    "participants": [
+                        {
+                            "puuid": f"puuid-{player}",
+                            "teamId": 100 if index % 2 else 200,
+                            "win": (index + game) % 2 == 0,
+                            "championId": (index + game * 7) % STUB_CHAMPIONS + 1,
+                            "kills": index,
+                            "deaths": game,
+                            "assists": index + game,
+                        }
+                        for index, player in enumerate(session_players)
+                    ],
+                },
+            }
+            for player in session_players:
+                match_ids.setdefault(f"puuid-{player}", []).insert(0, match_id)
+    return matches, match_ids
+
+
+async def start_stub_server(matches, match_ids, request_counts):
+    champion_data = stub_champion_data()
+
+    @web.middleware
+    async def count_requests(request, handler):
+        request_counts[request.match_info.route.name] += 1
+        return await handler(request)
+
+    async def versions(request):
+        return web.json_response([STUB_PATCH])
+
+    async def champions(request):
+        return web.json_response({"data": champion_data})
+
+    async def account(request):
+        game_name = request.match_info["game_name"]
+        tag_line = request.match_info["tag_line"]
+        return web.json_response(
+            {
+                "puuid": f"puuid-{game_name}-{tag_line}",
+                "gameName": game_name,
+                "tagLine": tag_line,
+            }
+        )
+
+    async def ids_by_puuid(request):
+        start = int(request.query.get("start", 0))
+        count = int(request.query.get("count", 20))
+        start_time = int(request.query.get("startTime", 0))
+        ids = [
+            match_id
+            for match_id in match_ids.get(request.match_info["puuid"], [])
+            if matches[match_id]["info"]["gameStartTimestamp"] // 1000 >= start_time
+        ]
+        return web.json_response(ids[start : start + count])
+
+    async def match(request):
+        match_id = request.match_info["match_id"]
+        if match_id not in matches:
+            raise web.HTTPNotFound()
+        return web.json_response(matches[match_id])
+
+    app = web.Application(middlewares=[count_requests])
+    app.router.add_get("/api/versions.json", versions)
+    app.router.add_get("/cdn/{patch}/data/en_US/champion.json", champions)
+    app.router.add_get(
+        "/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}", account
+    )
+    app.router.add_get(
+        "/lol/match/v5/matches/by-puuid/{puuid}/ids", ids_by_puuid, name="match-ids"
+    )
+    app.router.add_get("/lol/match/v5/matches/{match_id}", match, name="match")
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, STUB_HOST, STUB_PORT).start()
+    return runner
+
+
+# --- Database ---
+
+
+async def seed_database(players):
+    """Create the schema and register every player with a random rating"""
+    await init_db()
+    rng = random.Random(0)
+    await save_players(
+        [
+            {
+                "discord_id": player,
+                "riot_game_name": f"Player{player}",
+                "riot_game_tagline": "BENCH",
+                "riot_puuid": f"puuid-{player}",
+            }
+            for player in players
+        ]
+    )
+    await apply_rating_changes({player: rng.randint(-500, 500) for player in players})
+
+
+# --- Fake Discord objects ---
+
+
+class FakeUser:
+    def __init__(self, user_id):
+        self.id = int(user_id)
+        self.mention = f"<@{user_id}>"
+
+
+class FakeResponse:
+    async def send_message(self, *args, **kwargs):
+        pass
+
+    async def defer(self, *args, **kwargs):
+        pass
+
+
+class FakeInteraction(discord.Interaction):
+    # Shadows the cached property, so a fake response can be assigned
+    response = None
+
+    def __init__(self, user_id):
+        # Interaction.__init__ needs a gateway payload, so it is skipped
+        self.user = FakeUser(user_id)
+        self.response = FakeResponse()
+
+
+class FakeMessage:
+    def __init__(self, message_id):
+        self.id = message_id
+        self.edits = 0
+
+    async def edit(self, **kwargs):
+        await asyncio.sleep(EDIT_LATENCY)
+        self.edits += 1
+
+    async def delete(self):
+        pass
+
+
+class FakeInteractionResponse:
+    def __init__(self, message):
+        self.message = message
+
+    async def original_response(self):
+        return self.message
+
+
+class FakeChannel:
+    def __init__(self, channel_id):
+        self.message = FakeMessage(channel_id)
+
+    async def fetch_message(self, message_id):
+        return self.message
+
+
+class FakeContext:
+    def __init__(self, guild_id, channel_id, user_id):
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.channel = FakeChannel(channel_id)
+        self.author = FakeUser(user_id)
+
+    async def respond(self, *args, **kwargs):
+        return FakeInteractionResponse(self.channel.message)
+
+
+# --- Scenarios ---
+
+
+async def click(view, button, user_id, timings):
+    interaction = FakeInteraction(user_id)
+    start = time.perf_counter()
+    await view.interaction_check(interaction)
+    await getattr(view, button).callback(interaction)
+    timings.setdefault(button, []).append(time.perf_counter() - start)
+
+
+async def run_session(cog, session, players, clicks_per_second, deadline, timings, rng):
+    """Start a session in its own channel and click random buttons at Poisson-distributed times"""
+    ctx = FakeContext(guild_id=session % 4, channel_id=session, user_id=players[0])
+    await ARAMCommands.aram.callback(cog, ctx)
+    view = cog.sessions.get(ctx.guild_id, ctx.channel_id)
+
+    clicks = []
+    while time.perf_counter() < deadline:
+        await asyncio.sleep(rng.expovariate(clicks_per_second))
+
+        user_id = rng.choice(players)
+        if str(user_id) not in view.signed_up_users:
+            button = "join_aram"
+        else:
+            button = rng.choices(
+                ("leave_aram", "roll_teams", "roll_champions"), weights=(1, 2, 4)
+            )[0]
+        # Clicks don't wait for each other, like users clicking at the same time
+        clicks.append(asyncio.create_task(click(view, button, user_id, timings)))
+
+    await asyncio.gather(*clicks)
+    return view
+
+
+def session_players(sessions, players_per_session):
+    """Discord IDs of the players of each session"""
+    return [
+        [
+            100000000000000000 + session * 100 + player
+            for player in range(players_per_session)
+        ]
+        for session in range(sessions)
+    ]
+
+
+async def benchmark_sessions(players, clicks_per_second, duration, seed):
+    rng = random.Random(seed)
+    sessions = len(players)
+
+    cog = ARAMCommands(bot=None)
+    cog.evict_idle_sessions.cancel()
+    timings = {}
+
+    start = time.perf_counter()
+    views = await asyncio.gather(
+        *(
+            run_session(
+                cog,
+                session,
+                players[session],
+                clicks_per_second / sessions,
+                start + duration,
+                timings,
+                random.Random(rng.random()),
+            )
+            for session in range(sessions)
+        )
+    )
+    elapsed = time.perf_counter() - start
+
+    # Let pending coalesced edits go out before counting them
+    await asyncio.gather(
+        *(view._edit_task for view in views if view._edit_task is not None)
+    )
+    for view in views:
+        view.stop()
+
+    clicks = sum(len(button_timings) for button_timings in timings.values())
+    return {
+        "clicks": clicks,
+        "clicks_per_second": clicks / elapsed,
+        "edits_requested": sum(view.edits_requested for view in views),
+        "edits_sent": sum(view.edits_sent for view in views),
+        "latency": {
+            "all": percentiles(
+                [t for button_timings in timings.values() for t in button_timings]
+            ),
+            **{
+                button: percentiles(button_timings)
+                for button, button_timings in sorted(timings.items())
+            },
+        },
+    }
+
+
+async def benchmark_riot_requests(requests, concurrency):
+    """Rate limited account-v1 lookups against the stub server"""
+    semaphore = asyncio.Semaphore(concurrency)
+    timings = []
+
+    async def lookup(number):
+        async with semaphore:
+            start = time.perf_counter()
+            await riot_get(
+                "europe",
+                "account-v1.by-riot-id",
+                f"/riot/account/v1/accounts/by-riot-id/Player{number}/BENCH",
+                Priority.INTERACTIVE,
+            )
+            timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(lookup(number) for number in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    return {"requests_per_second": requests / elapsed, "latency": percentiles(timings)}
+
+
+async def benchmark_match_ingestion(players, request_counts):
+    """Ingest the stub matches of all players, then again to check only new match IDs are fetched"""
+    puuids = {f"puuid-{player}" for group in players for player in group}
+    ingestion = MatchIngestion(region="europe", delay=0)
+    results = {}
+
+    for run in ("first_sync", "second_sync"):
+        request_counts.clear()
+        start = time.perf_counter()
+        stored = await ingestion.ingest(puuids, since=0)
+        results[run] = {
+            "seconds": time.perf_counter() - start,
+            "matches_stored": stored,
+            "match_id_requests": request_counts["match-ids"],
+            "match_requests": request_counts["match"],
+        }
+
+    return results
+
+
+async def main(args):
+    players = session_players(args.sessions, args.players)
+    await seed_database([str(p) for group in players for p in group])
+
+    request_counts = collections.Counter()
+    stub_server = await start_stub_server(
+        *stub_matches(players, args.games), request_counts
+    )
+    try:
+        champion_catalog.replace(
+            (int(c["key"]), c["id"], c["name"], None, c["tags"])
+            for c in condense_champion_data(await fetch_champion_data())
+        )
+
+        results = {
+            "config": vars(args),
+            "sessions": await benchmark_sessions(
+                players, args.clicks_per_second, args.duration, args.seed
+            ),
+            "riot_requests": await benchmark_riot_requests(
+                args.riot_requests, args.riot_concurrency
+            ),
+            "match_ingestion": await benchmark_match_ingestion(players, request_counts),
+        }
+    finally:
+        await http_client.close_session()
+        await stub_server.cleanup()
+        await close_db()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            output_file.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sessions", type=int, default=20, help="Concurrent ARAM sessions"
+    )
+    parser.add_argument(
+        "--clicks-per-second",
+        type=float,
+        default=50,
+        help="Button clicks per second, over all sessions",
+    )
+    parser.add_argument(
+        "--duration", type=float, default=10, help="Seconds to click for"
+    )
+    parser.add_argument("--players", type=int, default=10, help="Players per session")
+    parser.add_argument(
+        "--games", type=int, default=5, help="Stub matches played per session"
+    )
+    parser.add_argument("--riot-requests", type=int, default=500)
+    parser.add_argument("--riot-concurrency", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the results to this file")
+    asyncio.run(main(parser.parse_args()))
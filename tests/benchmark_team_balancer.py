@@ -0,0 +1,49 @@
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.team_balancer import balance_teams
+
+# One frame at 60 fps
+BUDGET_MS = 1000 / 60
+LOBBY_SIZES = [2, 5, 9, 10, 11, 20, 50, 100, 200, 500]
+ROUNDS = 200
+
+
+def benchmark(lobby_size, rounds=ROUNDS, seed=0):
+    """Time balance_teams on random ratings, returning (p50 ms, max ms, worst rating difference)"""
+    rng = random.Random(seed)
+    timings = []
+    worst_difference = 0
+
+    for _ in range(rounds):
+        ratings = {player: rng.randint(800, 2600) for player in range(lobby_size)}
+
+        start = time.perf_counter()
+        team_1, team_2 = balance_teams(ratings, rng=rng)
+        timings.append((time.perf_counter() - start) * 1000)
+
+        difference = abs(
+            sum(ratings[player] for player in team_1)
+            - sum(ratings[player] for player in team_2)
+        )
+        worst_difference = max(worst_difference, difference)
+
+    return statistics.median(timings), max(timings), worst_difference
+
+
+if __name__ == "__main__":
+    print(f"{'players':>8} {'p50 ms':>8} {'max ms':>8} {'worst diff':>11}")
+    within_budget = True
+
+    for lobby_size in LOBBY_SIZES:
+        p50, slowest, worst_difference = benchmark(lobby_size)
+        within_budget &= slowest < BUDGET_MS
+        print(f"{lobby_size:>8} {p50:>8.3f} {slowest:>8.3f} {worst_difference:>11}")
+
+    print(f"All splits within {BUDGET_MS:.1f} ms: {within_budget}")
+    sys.exit(0 if within_budget else 1)
@@ -1,11 +1,15 @@
+import asyncio
 import os
 import sys
-from urllib3.exceptions import NameResolutionError
-from requests.exceptions import ConnectionError
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from db.database import get_db_connection
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from db.champions import fetch_champions
+from db.database import init_db, close_db
 from utils.riot_api import (
     fetch_free_champion_rotation,
     fetch_champion_data,
@@ -14,15 +18,17 @@ from utils.riot_api import (
 )
 
 
-def display_champions():
-    db_connection = get_db_connection()
-    cursor = db_connection.cursor()
+async def display_champions():
+    return await fetch_champions()
 
-    cursor.execute(f"SELECT * FROM champion")
-    champions = cursor.fetchall()
 
-    return champions
+async def main():
+    await init_db()
+    try:
+        print(await display_champions())
+    finally:
+        await close_db()
 
 
 if __name__ == "__main__":
-    print(display_champions())
+    asyncio.run(main())
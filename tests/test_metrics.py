@@ -0,0 +1,50 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.metrics import statement_label
+
+
+class StatementLabelTest(unittest.TestCase):
+    def test_select(self):
+        self.assertEqual(
+            statement_label("SELECT * FROM player WHERE discord_id = %s"),
+            "SELECT player",
+        )
+
+    def test_insert(self):
+        self.assertEqual(
+            statement_label("\n    INSERT INTO rating (discord_id) VALUES (%s)"),
+            "INSERT rating",
+        )
+
+    def test_update(self):
+        self.assertEqual(
+            statement_label("UPDATE player SET riot_game_name = %s"), "UPDATE player"
+        )
+        self.assertEqual(
+            statement_label("\n    UPDATE `Champion` SET emoji_id = %s"),
+            "UPDATE Champion",
+        )
+
+    def test_update_with_subquery(self):
+        self.assertEqual(
+            statement_label("UPDATE rating SET elo = (SELECT 1 FROM player)"),
+            "UPDATE rating",
+        )
+
+    def test_create_table(self):
+        self.assertEqual(
+            statement_label("CREATE TABLE IF NOT EXISTS skipped_match (match_id INT)"),
+            "CREATE skipped_match",
+        )
+
+    def test_other(self):
+        self.assertEqual(statement_label("COMMIT"), "COMMIT")
+        self.assertEqual(statement_label(""), "other")
+
+
+if __name__ == "__main__":
+    unittest.main()
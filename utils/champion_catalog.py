@@ -0,0 +1,135 @@
+import bisect
+import logging
+from array import array
+from typing import NamedTuple
+from db.champions import fetch_champions
+
+logger = logging.getLogger("araminator")
+
+
+class CatalogSnapshot(NamedTuple):
+    """Immutable column-wise view of the catalog. Champions are identified by their position (index)."""
+
+    keys: array
+    ids: tuple
+    names: tuple
+    emoji_ids: array  # 0 where no emoji has been uploaded
+    tags: tuple  # Tuple of Data Dragon tags per champion, the first one is the primary class
+    positions: dict  # Champion key -> index
+    all_mask: int  # Bitset with a bit set for every index
+    tag_groups: dict  # Primary tag -> (indexes, bitset of those indexes)
+    name_index: (
+        tuple  # (casefolded name, index) pairs sorted by name, for prefix lookups
+    )
+
+
+class ChampionCatalog:
+    """In-memory copy of the Champion table, used to roll champions without touching the database.
+
+    Champions are stored column-wise (typed arrays for the numeric columns) and indexed
+    by position, so drawing k random champions is an O(k) sample of positions. Sets of
+    champions are represented as int bitsets over those positions, with a precomputed
+    bitset per primary class (tag).
+    """
+
+    def __init__(self):
+        self._snapshot = self._build([])
+
+    def __len__(self):
+        return len(self._snapshot.keys)
+
+    def snapshot(self):
+        """Current contents. Hold on to it for the duration of a draw, indexes are only valid within one snapshot."""
+        return self._snapshot
+
+    def replace(self, champions):
+        """Replace the catalog contents with rows of (key, id, name, emoji_id, tags)"""
+        # Build the new snapshot before swapping it in, so concurrent rolls never see a half-loaded catalog
+        self._snapshot = self._build(champions)
+
+    async def load(self):
+        """(Re)load the catalog from the Champion table"""
+        self.replace(await fetch_champions())
+        logger.info(f"Champion catalog loaded with {len(self)} champions.")
+
+    def champion(self, index, snapshot=None):
+        """Champion at `index` as a dict shaped like a Champion row"""
+        if snapshot is None:
+            snapshot = self._snapshot
+        return {
+            "key": snapshot.keys[index],
+            "id": snapshot.ids[index],
+            "name": snapshot.names[index],
+            "emoji_id": snapshot.emoji_ids[index] or None,
+            "tags": list(snapshot.tags[index]),
+        }
+
+    def find(self, name):
+        """Champion whose name or id matches `name` (case-insensitive), or None"""
+        snapshot = self._snapshot
+        name = name.strip().casefold()
+        for index, (champion_id, champion_name) in enumerate(
+            zip(snapshot.ids, snapshot.names)
+        ):
+            if name in (champion_id.casefold(), champion_name.casefold()):
+                return self.champion(index, snapshot)
+        return None
+
+    def keys_with_prefix(self, prefix, snapshot=None):
+        """Keys of the champions whose name starts with `prefix` (case-insensitive), in name order"""
+        if snapshot is None:
+            snapshot = self._snapshot
+        prefix = prefix.strip().casefold()
+        start = bisect.bisect_left(snapshot.name_index, (prefix,))
+        keys = []
+        for name, index in snapshot.name_index[start:]:
+            if not name.startswith(prefix):
+                break
+            keys.append(snapshot.keys[index])
+        return keys
+
+    @staticmethod
+    def mask_of_keys(snapshot, keys):
+        """Bitset of the champions with the given keys (unknown keys are ignored)"""
+        mask = 0
+        for key in keys:
+            index = snapshot.positions.get(key)
+            if index is not None:
+                mask |= 1 << index
+        return mask
+
+    @staticmethod
+    def _build(champions):
+        champions = sorted(champions, key=lambda champ: int(champ[0]))
+        tags = tuple(
+            tuple(tag for tag in (champ[4] or "").split(",") if tag)
+            for champ in champions
+        )
+
+        grouped = {}
+        for index, champion_tags in enumerate(tags):
+            primary_tag = champion_tags[0] if champion_tags else ""
+            grouped.setdefault(primary_tag, []).append(index)
+
+        return CatalogSnapshot(
+            keys=array("q", (int(champ[0]) for champ in champions)),
+            ids=tuple(champ[1] for champ in champions),
+            names=tuple(champ[2] for champ in champions),
+            emoji_ids=array("Q", (int(champ[3] or 0) for champ in champions)),
+            tags=tags,
+            positions={int(champ[0]): index for index, champ in enumerate(champions)},
+            all_mask=(1 << len(champions)) - 1,
+            tag_groups={
+                tag: (tuple(indexes), sum(1 << index for index in indexes))
+                for tag, indexes in grouped.items()
+            },
+            name_index=tuple(
+                sorted(
+                    (champ[2].casefold(), index)
+                    for index, champ in enumerate(champions)
+                )
+            ),
+        )
+
+
+champion_catalog = ChampionCatalog()
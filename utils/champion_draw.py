@@ -0,0 +1,95 @@
+import random
+
+# Random picks tried against a bitset before falling back to scanning the candidate list
+MAX_REJECTIONS = 8
+
+
+def draw_pools(
+    snapshot, pool_size, excluded=0, pool_masks=(None, None), balance_tags=True, rng=random
+):
+    """Draw two disjoint champion pools of equal size from a catalog snapshot
+
+    Champions are drawn in pairs, one for each pool. With `balance_tags`, both champions
+    of a pair share their primary class (Fighter, Mage, ...), so both pools end up with
+    the same class distribution. All constraints are bitsets over the snapshot's indexes,
+    so each pick costs a few bit operations regardless of how many constraints apply.
+
+    Args:
+        snapshot (CatalogSnapshot): Catalog to draw from
+        pool_size (int): Champions per pool
+        excluded (int, optional): Bitset of champions that may not be drawn (bans, recent rolls). Defaults to 0.
+        pool_masks (tuple, optional): Per pool, a bitset of the only champions allowed in that
+            pool (e.g. champions owned by that team), or None for no restriction. Defaults to (None, None).
+        balance_tags (bool, optional): Pair champions by primary class. Defaults to True.
+        rng (random.Random, optional): Source of randomness. Defaults to the random module.
+
+    Returns:
+        tuple: (pool 1 indexes, pool 2 indexes), shorter than `pool_size` if too few champions are allowed
+    """
+    available = snapshot.all_mask & ~excluded
+    masks = [available if mask is None else available & mask for mask in pool_masks]
+    all_indexes = range(len(snapshot.keys))
+    pools = ([], [])
+
+    for _ in range(pool_size):
+        pair = None
+        if balance_tags:
+            pair = _draw_tag_pair(snapshot, masks, rng)
+        if pair is None:
+            pair = _draw_pair(all_indexes, snapshot.all_mask, masks, rng)
+        if pair is None:
+            break
+
+        for pool, index in zip(pools, pair):
+            pool.append(index)
+            masks[0] &= ~(1 << index)
+            masks[1] &= ~(1 << index)
+
+    return pools
+
+
+def _draw_tag_pair(snapshot, masks, rng):
+    """Draw one champion per pool from the same primary class, chosen weighted by availability"""
+    groups = []
+    weights = []
+    for indexes, group_mask in snapshot.tag_groups.values():
+        weight = min((group_mask & masks[0]).bit_count(), (group_mask & masks[1]).bit_count())
+        if weight and (group_mask & (masks[0] | masks[1])).bit_count() >= 2:
+            groups.append((indexes, group_mask))
+            weights.append(weight)
+
+    while groups:
+        position = rng.choices(range(len(groups)), weights)[0]
+        pair = _draw_pair(*groups[position], masks, rng)
+        if pair is not None:
+            return pair
+        del groups[position], weights[position]
+
+    return None
+
+
+def _draw_pair(indexes, group_mask, masks, rng):
+    first = _pick(indexes, group_mask & masks[0], rng)
+    if first is None:
+        return None
+
+    second = _pick(indexes, group_mask & masks[1] & ~(1 << first), rng)
+    if second is None:
+        return None
+
+    return first, second
+
+
+def _pick(indexes, mask, rng):
+    """Random index from `indexes` whose bit is set in `mask`, or None"""
+    if not mask:
+        return None
+
+    # Rejection sampling is O(1) expected while a reasonable share of the group is allowed
+    for _ in range(MAX_REJECTIONS):
+        index = rng.choice(indexes)
+        if mask >> index & 1:
+            return index
+
+    candidates = [index for index in indexes if mask >> index & 1]
+    return rng.choice(candidates) if candidates else None
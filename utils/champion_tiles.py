@@ -0,0 +1,81 @@
+import hashlib
+import json
+import os
+import tempfile
+
+TILE_DIRECTORY = "assets/images/champion_squares/"
+MANIFEST_FILE = "manifest.json"
+
+
+def write_atomic(path, data):
+    """Write bytes to `path` via a temporary file, so readers never see a partially written file"""
+    directory = os.path.dirname(path) or "."
+    file_descriptor, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+
+    try:
+        with os.fdopen(file_descriptor, "wb") as temp_file:
+            temp_file.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def load_manifest(directory=TILE_DIRECTORY):
+    """Load the tile manifest, tracking patch version and content hash per champion tile
+
+    Returns:
+        dict: {"patch": str | None, "tiles": {champion id: {"patch": str, "sha256": str}}}
+    """
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE), encoding="utf-8") as manifest_file:
+            manifest = json.load(manifest_file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        manifest = {}
+
+    manifest.setdefault("patch", None)
+    manifest.setdefault("tiles", {})
+    return manifest
+
+
+def save_manifest(manifest, directory=TILE_DIRECTORY):
+    os.makedirs(directory, exist_ok=True)
+    write_atomic(
+        os.path.join(directory, MANIFEST_FILE),
+        json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"),
+    )
+
+
+def tile_path(champion_id, directory=TILE_DIRECTORY):
+    return os.path.join(directory, f"{champion_id}.png")
+
+
+def is_current(manifest, champion_id, patch, directory=TILE_DIRECTORY):
+    """Whether the tile of a champion was already synced for `patch` and is still on disk"""
+    entry = manifest["tiles"].get(champion_id)
+    return (
+        entry is not None
+        and entry["patch"] == patch
+        and os.path.exists(tile_path(champion_id, directory))
+    )
+
+
+def store_tile(manifest, champion_id, data, patch, directory=TILE_DIRECTORY):
+    """Save a tile and record it in the manifest. Identical content is not rewritten.
+
+    Returns:
+        str: "written" if the file was written, "unchanged" if the content was already on disk
+    """
+    sha256 = hashlib.sha256(data).hexdigest()
+    entry = manifest["tiles"].get(champion_id)
+    path = tile_path(champion_id, directory)
+
+    if entry is not None and entry["sha256"] == sha256 and os.path.exists(path):
+        status = "unchanged"
+    else:
+        os.makedirs(directory, exist_ok=True)
+        write_atomic(path, data)
+        status = "written"
+
+    manifest["tiles"][champion_id] = {**(entry or {}), "patch": patch, "sha256": sha256}
+    return status
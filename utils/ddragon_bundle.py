@@ -0,0 +1,118 @@
+"""Ingest champion data and tiles from a local Data Dragon archive (dragontail-<patch>.tgz).
+
+Usage: python -m utils.ddragon_bundle path/to/dragontail-15.1.1.tgz
+"""
+
+import asyncio
+import collections
+import json
+import logging
+import re
+import sys
+import tarfile
+from dotenv import load_dotenv
+
+if __name__ == "__main__":
+    # Read .env before the modules below read their configuration on import
+    load_dotenv()
+
+from db.champions import sync_champions
+from db.database import close_db, init_db
+from . import champion_tiles, http_client
+from .riot_api import condense_champion_data
+
+
+logger = logging.getLogger("araminator")
+
+# <patch>/data/en_US/champion.json and <patch>/img/champion/<id>.png, optionally prefixed by ./
+MEMBER_PATTERN = re.compile(
+    r"^(?:\./)?(?P<patch>\d+\.\d+\.\d+)/"
+    r"(?:(?P<data>data/en_US/champion\.json)|img/champion/(?P<tile>[^/]+)\.png)$"
+)
+
+
+def read_bundle(path, directory=champion_tiles.TILE_DIRECTORY):
+    """Stream champion.json and the champion tiles out of a Data Dragon archive.
+
+    The archive is read sequentially in a single pass and only the matching entries are
+    decompressed into memory, one at a time; nothing else is extracted to disk. Tiles are
+    stored through the tile manifest, so tiles already current for the patch are skipped.
+
+    Args:
+        path (str): Path to the .tgz archive
+        directory (str, optional): Tile directory. Defaults to champion_tiles.TILE_DIRECTORY.
+
+    Returns:
+        tuple: (patch, champion data, tile summary)
+    """
+    manifest = champion_tiles.load_manifest(directory)
+    summary = collections.Counter(written=0, unchanged=0, skipped=0)
+    patch = None
+    champion_data = None
+
+    with tarfile.open(path, mode="r|*") as archive:
+        for member in archive:
+            match = MEMBER_PATTERN.match(member.name) if member.isfile() else None
+            if match is None:
+                continue
+
+            if patch is None:
+                patch = match["patch"]
+            elif match["patch"] != patch:
+                logger.warning(f"Ignoring {member.name}, bundle is for patch {patch}.")
+                continue
+
+            if match["data"]:
+                champion_data = json.load(archive.extractfile(member))["data"]
+            elif champion_tiles.is_current(manifest, match["tile"], patch, directory):
+                summary["skipped"] += 1
+            else:
+                data = archive.extractfile(member).read()
+                status = champion_tiles.store_tile(
+                    manifest, match["tile"], data, patch, directory
+                )
+                summary[status] += 1
+
+    if champion_data is None:
+        raise ValueError(f"{path} does not contain data/en_US/champion.json")
+
+    manifest["patch"] = patch
+    champion_tiles.save_manifest(manifest, directory)
+
+    return patch, champion_data, dict(summary)
+
+
+async def ingest_bundle(path):
+    """Load champion data and tiles from a Data Dragon archive into the database and tile directory
+
+    Returns:
+        tuple: (patch, champion change report, tile summary)
+    """
+    patch, champion_data, tile_summary = await asyncio.to_thread(read_bundle, path)
+    report = await sync_champions(condense_champion_data(champion_data))
+
+    logger.info(
+        f"Ingested Data Dragon bundle {path} (patch {patch}): "
+        + ", ".join(f"{len(names)} {change}" for change, names in report.items())
+        + "; tiles "
+        + ", ".join(f"{count} {status}" for status, count in tile_summary.items())
+    )
+    return patch, report, tile_summary
+
+
+async def main(path):
+    await init_db()
+    try:
+        await ingest_bundle(path)
+    finally:
+        await http_client.close_session()
+        await close_db()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print(__doc__.strip())
+        sys.exit(1)
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(sys.argv[1]))
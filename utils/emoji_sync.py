@@ -0,0 +1,160 @@
+import asyncio
+import collections
+import hashlib
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+import discord
+from db.champions import fetch_champions, save_emoji_ids
+from . import champion_tiles
+
+# Discord's limits for emojis: 128x128 pixels and 256 KiB
+EMOJI_SIZE = 128
+EMOJI_MAX_BYTES = 256 * 1024
+# Threads resizing and compressing tiles, Pillow releases the GIL while doing so
+EMOJI_RESIZE_WORKERS = int(os.getenv("EMOJI_RESIZE_WORKERS", "4"))
+# Maximum emoji uploads in flight, discord.py still waits out rate limits per request
+EMOJI_UPLOAD_CONCURRENCY = int(os.getenv("EMOJI_UPLOAD_CONCURRENCY", "4"))
+
+
+logger = logging.getLogger("araminator")
+
+
+def prepare_emoji(path):
+    """Read a tile and shrink it to the emoji limits. Runs in a worker thread.
+
+    Returns:
+        bytes: PNG image of at most EMOJI_SIZE pixels per side and EMOJI_MAX_BYTES
+    """
+    # Pillow is only needed by this owner-only sync, so it's imported where it's used
+    from PIL import Image
+
+    with Image.open(path) as image:
+        image = image.convert("RGBA")
+        image.thumbnail((EMOJI_SIZE, EMOJI_SIZE), Image.Resampling.LANCZOS)
+
+        output = io.BytesIO()
+        image.save(output, format="PNG", optimize=True)
+        if output.tell() > EMOJI_MAX_BYTES:
+            # A 256 color palette is indistinguishable at emoji size
+            output = io.BytesIO()
+            image.quantize(256).save(output, format="PNG", optimize=True)
+
+    return output.getvalue()
+
+
+def tile_hash(manifest, champion_id, directory):
+    """SHA-256 of a champion tile, from the manifest if it's tracked there"""
+    entry = manifest["tiles"].get(champion_id)
+    if entry is not None:
+        return entry["sha256"]
+
+    with open(champion_tiles.tile_path(champion_id, directory), "rb") as tile_file:
+        return hashlib.sha256(tile_file.read()).hexdigest()
+
+
+async def sync_emojis(
+    bot,
+    directory=champion_tiles.TILE_DIRECTORY,
+    concurrency=EMOJI_UPLOAD_CONCURRENCY,
+):
+    """Upload the champion tiles as application emojis and store their IDs in the Champion table.
+
+    Existing application emojis are matched to champions by name (the champion id).
+    Only missing emojis and emojis whose tile changed since it was uploaded (tracked
+    by tile hash in the tile manifest) are uploaded, the tiles of those are resized in
+    a thread pool. All emoji IDs are written back in a single transaction.
+
+    Args:
+        bot (discord.Bot): Bot whose application owns the emojis
+        directory (str, optional): Tile directory. Defaults to champion_tiles.TILE_DIRECTORY.
+        concurrency (int, optional): Maximum simultaneous uploads. Defaults to EMOJI_UPLOAD_CONCURRENCY.
+
+    Returns:
+        dict: Champion ids per outcome (uploaded, replaced, unchanged, missing_tile, failed)
+    """
+    manifest = await asyncio.to_thread(champion_tiles.load_manifest, directory)
+    existing = {emoji.name: emoji for emoji in await bot.fetch_emojis()}
+    summary = collections.defaultdict(list)
+    emoji_ids = {}
+    uploads = []
+
+    for _, champion_id, _, _, _ in await fetch_champions():
+        if not os.path.exists(champion_tiles.tile_path(champion_id, directory)):
+            summary["missing_tile"].append(champion_id)
+            continue
+
+        sha256 = await asyncio.to_thread(tile_hash, manifest, champion_id, directory)
+        emoji = existing.get(champion_id)
+        entry = manifest["tiles"].setdefault(
+            champion_id, {"patch": None, "sha256": sha256}
+        )
+
+        # Emojis uploaded before their tile hash was tracked are assumed to be current
+        if emoji is not None and entry.setdefault("emoji_sha256", sha256) == sha256:
+            emoji_ids[champion_id] = emoji.id
+            summary["unchanged"].append(champion_id)
+        else:
+            uploads.append((champion_id, sha256, emoji))
+
+    if uploads:
+        loop = asyncio.get_running_loop()
+        # A thread pool rather than processes: forking the bot would copy its live threads
+        executor = ThreadPoolExecutor(
+            max_workers=EMOJI_RESIZE_WORKERS, thread_name_prefix="emoji"
+        )
+        try:
+            images = await asyncio.gather(
+                *(
+                    loop.run_in_executor(
+                        executor,
+                        prepare_emoji,
+                        champion_tiles.tile_path(champion_id, directory),
+                    )
+                    for champion_id, _, _ in uploads
+                ),
+                return_exceptions=True,
+            )
+        finally:
+            # Without waiting, shutting down never blocks the event loop
+            executor.shutdown(wait=False)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def upload(champion_id, sha256, emoji, image):
+            if isinstance(image, Exception):
+                logger.warning(f"Preparing the emoji of {champion_id} failed: {image}")
+                summary["failed"].append(champion_id)
+                return
+
+            async with semaphore:
+                try:
+                    # Emoji names are unique per application, so the outdated one goes first
+                    if emoji is not None:
+                        await bot.delete_emoji(emoji)
+                        emoji_ids[champion_id] = None
+                    created = await bot.create_emoji(name=champion_id, image=image)
+                except discord.HTTPException as e:
+                    logger.warning(f"Uploading the emoji of {champion_id} failed: {e}")
+                    summary["failed"].append(champion_id)
+                    return
+
+            emoji_ids[champion_id] = created.id
+            manifest["tiles"][champion_id]["emoji_sha256"] = sha256
+            summary["replaced" if emoji is not None else "uploaded"].append(champion_id)
+
+        await asyncio.gather(
+            *(
+                upload(*champion_upload, image)
+                for champion_upload, image in zip(uploads, images)
+            )
+        )
+
+    await asyncio.to_thread(champion_tiles.save_manifest, manifest, directory)
+    await save_emoji_ids(emoji_ids)
+    logger.info(
+        "Champion emojis synced: "
+        + ", ".join(f"{len(ids)} {outcome}" for outcome, ids in summary.items())
+    )
+    return dict(summary)
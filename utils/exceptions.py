@@ -7,3 +7,38 @@ class InvalidRiotIDFormatError(Exception):
 
     def __str__(self):
         return self.message
+
+
+class RiotAPIError(Exception):
+    """Exception for unexpected responses from the Riot API or Data Dragon"""
+
+    def __init__(self, status, url, message):
+        super().__init__(self, message)
+        self.status = status
+        self.url = url
+        self.message = message
+
+    def __str__(self):
+        return f"Error {self.status}, {self.url}: {self.message}"
+
+
+class RiotAccountTakenError(Exception):
+    """Exception for when a Riot account or game name is already linked to another Discord user"""
+
+    def __init__(self, message):
+        super().__init__(self, message)
+        self.message = message
+
+    def __str__(self):
+        return self.message
+
+
+class SessionLimitError(Exception):
+    """Exception for when an ARAM session can't be started in a channel or guild"""
+
+    def __init__(self, message):
+        super().__init__(self, message)
+        self.message = message
+
+    def __str__(self):
+        return self.message
@@ -0,0 +1,42 @@
+from db.champions import (
+    add_guild_ban,
+    fetch_all_guild_bans,
+    fetch_guild_bans,
+    remove_guild_ban,
+)
+
+
+class GuildBans:
+    """Champion ban lists per guild, loaded once per guild and kept in sync by the ban commands"""
+
+    def __init__(self):
+        self._bans = {}  # guild_id -> set of champion keys
+        self._all_loaded = False
+
+    async def load_all(self):
+        """Load the bans of all guilds at once, e.g. at startup, so no roll has to query them"""
+        self._bans = await fetch_all_guild_bans()
+        self._all_loaded = True
+
+    async def get(self, guild_id):
+        """Keys of the champions banned in a guild"""
+        if guild_id not in self._bans:
+            if self._all_loaded:
+                return frozenset()
+            self._bans[guild_id] = await fetch_guild_bans(guild_id)
+        return frozenset(self._bans[guild_id])
+
+    async def add(self, guild_id, champion_key):
+        await add_guild_ban(guild_id, champion_key)
+        if guild_id in self._bans:
+            self._bans[guild_id].add(champion_key)
+        elif self._all_loaded:
+            self._bans[guild_id] = {champion_key}
+
+    async def remove(self, guild_id, champion_key):
+        await remove_guild_ban(guild_id, champion_key)
+        if guild_id in self._bans:
+            self._bans[guild_id].discard(champion_key)
+
+
+guild_bans = GuildBans()
@@ -0,0 +1,106 @@
+import asyncio
+import json
+import logging
+import os
+import random
+from typing import Mapping, NamedTuple
+import aiohttp
+
+# Total seconds allowed per request attempt (connect + read)
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_CONNECTIONS_PER_HOST", "10"))
+# Base delay in seconds for exponential backoff between retries
+HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.5"))
+
+RETRY_STATUSES = frozenset({500, 502, 503, 504})
+
+
+logger = logging.getLogger("araminator")
+
+_session = None
+
+
+class Response(NamedTuple):
+    """Fully read HTTP response, safe to use after the underlying connection is released"""
+
+    status: int
+    headers: Mapping[str, str]
+    body: bytes
+    url: str
+
+    def json(self):
+        return json.loads(self.body)
+
+    @property
+    def text(self):
+        return self.body.decode("utf-8", errors="replace")
+
+
+def get_session():
+    """Return the shared client session, creating it on first use.
+
+    The session keeps one keep-alive connection pool per host, so every Riot and
+    Data Dragon call reuses open connections instead of doing a new TCP/TLS handshake.
+    """
+    global _session
+
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=0,
+            limit_per_host=HTTP_CONNECTIONS_PER_HOST,
+            ttl_dns_cache=300,
+            keepalive_timeout=60,
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT),
+        )
+
+    return _session
+
+
+async def close_session():
+    """Close the shared client session"""
+    global _session
+
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+async def get(url, headers=None, retries=HTTP_MAX_RETRIES, before_retry=None):
+    """Send a GET request with the shared session.
+
+    Connection errors, timeouts and 5xx responses are retried with exponential backoff
+    and jitter. Other responses (including 4xx) are returned as-is for the caller to handle.
+
+    Args:
+        url (str): URL to fetch
+        headers (dict, optional): Request headers. Defaults to None.
+        retries (int, optional): Number of retries after the first attempt. Defaults to HTTP_MAX_RETRIES.
+        before_retry (Callable, optional): Coroutine function awaited before every retry,
+            e.g. to take a rate limiter token. Defaults to None.
+
+    Returns:
+        Response: Status, headers and body of the final attempt
+    """
+    for attempt in range(retries + 1):
+        if attempt and before_retry is not None:
+            await before_retry()
+        try:
+            async with get_session().get(url, headers=headers) as response:
+                result = Response(
+                    response.status, response.headers, await response.read(), url
+                )
+
+            if result.status not in RETRY_STATUSES or attempt == retries:
+                return result
+
+            logger.debug(f"GET {url} returned {result.status}, retrying.")
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            if attempt == retries:
+                raise
+            logger.debug(f"GET {url} failed with {e!r}, retrying.")
+
+        await asyncio.sleep(HTTP_RETRY_BACKOFF * 2**attempt * random.uniform(0.5, 1))
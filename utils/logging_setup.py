@@ -0,0 +1,115 @@
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import time
+
+LOG_DIRECTORY = os.getenv("LOG_DIRECTORY", "logs")
+LOG_FORMAT = "%(asctime)s :: %(levelname)-7s :: %(message)s"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG")
+DISCORD_LOG_LEVEL = os.getenv("DISCORD_LOG_LEVEL", "DEBUG")
+# Rotate log files at this size, or on a schedule if LOG_ROTATE_WHEN is set (e.g. "midnight")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_ROTATE_WHEN = os.getenv("LOG_ROTATE_WHEN", "")
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+# DEBUG records kept per second and logger (0 for no limit), and the share of them that is kept
+LOG_DEBUG_RATE_LIMIT = float(os.getenv("LOG_DEBUG_RATE_LIMIT", "50"))
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"))
+
+
+class DebugThrottle(logging.Filter):
+    """Sample and rate limit DEBUG records, per logger, with a token bucket.
+
+    Records of level INFO and above always pass. The filter is attached to the
+    QueueHandler, so it runs on the thread that logs (usually the event loop) before
+    the record is prepared and queued. Dropped records are never formatted or queued,
+    so they cost next to nothing.
+    """
+
+    def __init__(self, rate_limit=LOG_DEBUG_RATE_LIMIT, sample_rate=LOG_DEBUG_SAMPLE_RATE):
+        super().__init__()
+        self.rate_limit = rate_limit
+        self.sample_rate = sample_rate
+        self.dropped = 0
+        self._buckets = {}  # logger name -> (tokens, last refill)
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG:
+            return True
+
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            self.dropped += 1
+            return False
+
+        if self.rate_limit <= 0:
+            return True
+
+        now = time.monotonic()
+        tokens, last_refill = self._buckets.get(record.name, (self.rate_limit, now))
+        tokens = min(self.rate_limit, tokens + (now - last_refill) * self.rate_limit)
+
+        if tokens < 1:
+            self._buckets[record.name] = (tokens, now)
+            self.dropped += 1
+            return False
+
+        self._buckets[record.name] = (tokens - 1, now)
+        return True
+
+
+debug_throttle = DebugThrottle()
+
+
+def _file_handler(filename, logger_name):
+    """Rotating file handler that only writes records of `logger_name` (and its children)"""
+    path = os.path.join(LOG_DIRECTORY, filename)
+    if LOG_ROTATE_WHEN:
+        handler = logging.handlers.TimedRotatingFileHandler(
+            path, when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+        )
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+        )
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    handler.addFilter(logging.Filter(logger_name))
+    return handler
+
+
+def setup_logging():
+    """Route the araminator and discord loggers through a queue to a background thread.
+
+    Log calls on the event loop only filter the record, merge its message with its
+    arguments (QueueHandler.prepare) and put it on a queue; the handlers' formatting and
+    file I/O happen on the listener thread. Call `listener.stop()` on shutdown to flush.
+
+    Returns:
+        logging.handlers.QueueListener: The started listener
+    """
+    os.makedirs(LOG_DIRECTORY, exist_ok=True)
+
+    console = logging.StreamHandler()
+    console.setLevel(logging.INFO)
+    console.addFilter(logging.Filter("araminator"))
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(
+        log_queue,
+        _file_handler("araminator.log", "araminator"),
+        _file_handler("discord.log", "discord"),
+        console,
+        respect_handler_level=True,
+    )
+
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(debug_throttle)
+
+    for name, level in (("araminator", LOG_LEVEL), ("discord", DISCORD_LOG_LEVEL)):
+        logger = logging.getLogger(name)
+        logger.setLevel(level)
+        logger.addHandler(queue_handler)
+        logger.propagate = False
+
+    listener.start()
+    return listener
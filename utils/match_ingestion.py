@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import os
+import time
+from db.matches import fetch_known_match_ids, fetch_sync_cursors, save_matches
+from .rate_limiter import Priority
+from .riot_api import fetch_match, fetch_match_ids
+
+# Routing region of the match-v5 requests
+MATCH_REGION = os.getenv("MATCH_REGION", "europe")
+# Seconds to wait after a session ends before looking up its games, Riot publishes matches shortly after they end
+MATCH_INGEST_DELAY = float(os.getenv("MATCH_INGEST_DELAY", "120"))
+# Maximum match-v5 match requests in flight, the rate limiter still paces the actual requests
+MATCH_FETCH_CONCURRENCY = int(os.getenv("MATCH_FETCH_CONCURRENCY", "8"))
+# Seconds the next sync of a player looks back before the previous one, so games that
+# were still running during a sync are picked up by the next one
+MATCH_CURSOR_OVERLAP = 3600
+
+CUSTOM_GAME_QUEUE_ID = 0
+
+
+logger = logging.getLogger("araminator")
+
+
+def compact_match(match):
+    """The parts of a match-v5 match that are stored, or None if it isn't an ARAM game"""
+    info = match["info"]
+    if info.get("gameMode") != "ARAM":
+        return None
+
+    return {
+        "match_id": match["metadata"]["matchId"],
+        "game_start": info["gameStartTimestamp"] // 1000,
+        "game_duration": info["gameDuration"],
+        "players": [
+            {
+                "riot_puuid": participant["puuid"],
+                "team_id": participant["teamId"],
+                "win": participant["win"],
+                "champion_key": participant["championId"],
+                "kills": participant["kills"],
+                "deaths": participant["deaths"],
+                "assists": participant["assists"],
+            }
+            for participant in info["participants"]
+        ],
+    }
+
+
+class MatchIngestion:
+    """Background ingestion of the custom ARAM games of session participants from match-v5.
+
+    Every player has a sync cursor, so only match IDs since their previous sync are
+    requested. The IDs of all players are merged and already stored matches are left
+    out, so a game shared by ten participants is fetched once. IDs of custom games that
+    aren't ARAM are stored as skipped, so they aren't fetched again either.
+    """
+
+    def __init__(self, region=MATCH_REGION, delay=MATCH_INGEST_DELAY):
+        self.region = region
+        self.delay = delay
+        self._queue = asyncio.Queue()
+        self._worker = None
+
+    def schedule(self, puuids, since):
+        """Ingest the games of players after a delay
+
+        Args:
+            puuids (Iterable[str]): PUUIDs of the players
+            since (float): Epoch timestamp to start at for players that have never been synced
+        """
+        self._queue.put_nowait((time.monotonic() + self.delay, set(puuids), since))
+
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._process_queue())
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+
+    async def _process_queue(self):
+        while not self._queue.empty():
+            due, puuids, since = self._queue.get_nowait()
+            await asyncio.sleep(due - time.monotonic())
+
+            try:
+                await self.ingest(puuids, since)
+            except Exception:
+                logger.exception("Match ingestion failed.")
+
+    async def ingest(self, puuids, since=None):
+        """Fetch and store the new custom ARAM games of players
+
+        Returns:
+            int: Number of matches stored
+        """
+        puuids = set(puuids)
+        synced_at = int(time.time())
+        cursors = await fetch_sync_cursors(puuids)
+
+        id_lists = await asyncio.gather(
+            *(
+                fetch_match_ids(
+                    puuid,
+                    self.region,
+                    start_time=cursors.get(puuid, since),
+                    queue=CUSTOM_GAME_QUEUE_ID,
+                    priority=Priority.BACKGROUND,
+                )
+                for puuid in puuids
+            )
+        )
+        match_ids = set().union(*id_lists)
+        new_match_ids = match_ids - await fetch_known_match_ids(match_ids)
+
+        semaphore = asyncio.Semaphore(MATCH_FETCH_CONCURRENCY)
+
+        async def fetch(match_id):
+            async with semaphore:
+                return await fetch_match(match_id, self.region, Priority.BACKGROUND)
+
+        new_match_ids = list(new_match_ids)
+        fetched = await asyncio.gather(*(fetch(id) for id in new_match_ids))
+
+        matches = []
+        skipped_match_ids = []
+        for match_id, match in zip(new_match_ids, fetched):
+            if match is None:
+                continue  # Not published yet, the next sync's overlap picks it up
+            compact = compact_match(match)
+            if compact is None:
+                # Remembered, so other custom games in the overlap aren't fetched again
+                skipped_match_ids.append(match_id)
+            else:
+                matches.append(compact)
+
+        await save_matches(
+            matches,
+            skipped_match_ids,
+            {puuid: synced_at - MATCH_CURSOR_OVERLAP for puuid in puuids},
+        )
+
+        logger.info(
+            f"Ingested {len(matches)} ARAM matches for {len(puuids)} players "
+            f"({len(match_ids)} match IDs, {len(new_match_ids)} new, "
+            f"{len(skipped_match_ids)} not ARAM)."
+        )
+        return len(matches)
+
+
+match_ingestion = MatchIngestion()
@@ -0,0 +1,236 @@
+import functools
+import logging
+import os
+import re
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Local address of the Prometheus text endpoint, an empty port disables it
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = os.getenv("METRICS_PORT", "9108")
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+logger = logging.getLogger("araminator")
+
+
+class Counter:
+    def __init__(self, name, description, labelnames=()):
+        self.name = name
+        self.description = description
+        self.labelnames = labelnames
+        self.values = {}  # label values -> count
+
+    def inc(self, *labels, amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values.items(), key=_label_order):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    """Latency histogram with fixed buckets, one series per combination of label values"""
+
+    def __init__(self, name, description, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self.series = {}  # label values -> [bucket counts, sum, count]
+
+    def observe(self, value, *labels):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def summary(self):
+        """Count, mean and approximate p50/p99 (bucket upper bounds) per label values"""
+        return {
+            labels: {
+                "count": count,
+                "mean": total / count,
+                "p50": self._quantile(bucket_counts, count, 0.5),
+                "p99": self._quantile(bucket_counts, count, 0.99),
+            }
+            for labels, (bucket_counts, total, count) in sorted(self.series.items(), key=_label_order)
+        }
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for labels, (bucket_counts, total, count) in sorted(self.series.items(), key=_label_order):
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), bucket_counts):
+                cumulative += bucket_count
+                bucket_labels = _labels(
+                    (*self.labelnames, "le"), (*labels, str(bound))
+                )
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            label_text = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {total}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+    def _quantile(self, bucket_counts, count, quantile):
+        rank = quantile * count
+        cumulative = 0
+        for bound, bucket_count in zip((*self.buckets, float("inf")), bucket_counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return bound
+        return float("inf")
+
+    @contextmanager
+    def time(self, *labels):
+        """Observe the duration of the block, with "ok" or "error" appended to the labels"""
+        start = time.perf_counter()
+        status = "error"
+        try:
+            yield
+            status = "ok"
+        finally:
+            self.observe(time.perf_counter() - start, *labels, status)
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def counter(self, name, description, labelnames=()):
+        return self.metrics.setdefault(name, Counter(name, description, labelnames))
+
+    def histogram(self, name, description, labelnames=()):
+        return self.metrics.setdefault(name, Histogram(name, description, labelnames))
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _label_order(item):
+    # Label values may mix types, e.g. HTTP status codes and "error"
+    return tuple(map(str, item[0]))
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = (f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + ",".join(pairs) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = Registry()
+
+command_latency = registry.histogram(
+    "araminator_command_seconds",
+    "Slash command handling time",
+    ("command", "status"),
+)
+button_latency = registry.histogram(
+    "araminator_button_seconds",
+    "ARAM session button handling time",
+    ("button", "status"),
+)
+db_latency = registry.histogram(
+    "araminator_db_statement_seconds",
+    "Database statement execution time",
+    ("statement", "status"),
+)
+riot_latency = registry.histogram(
+    "araminator_riot_request_seconds",
+    "Riot API and Data Dragon request time, status is the HTTP status",
+    ("endpoint", "status"),
+)
+errors = registry.counter(
+    "araminator_errors_total",
+    "Failed commands, button handlers, statements and requests",
+    ("kind", "name"),
+)
+
+# The table of an UPDATE follows the verb itself, which the general pattern has consumed
+UPDATE_PATTERN = re.compile(r"^\s*(UPDATE)\s+`?(\w+)", re.IGNORECASE)
+STATEMENT_PATTERN = re.compile(
+    r"^\s*(\w+)(?:.*?\b(?:FROM|INTO|UPDATE|TABLE(?: IF NOT EXISTS)?)\s+`?(\w+))?",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def statement_label(operation):
+    """Low-cardinality label of a SQL statement, e.g. "SELECT player" or "UPDATE player" """
+    match = UPDATE_PATTERN.match(operation) or STATEMENT_PATTERN.match(operation)
+    if match is None:
+        return "other"
+    verb, table = match.groups()
+    return f"{verb.upper()} {table}" if table else verb.upper()
+
+
+def timed(histogram, kind, name):
+    """Decorator recording the duration and failures of a coroutine function"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            try:
+                with histogram.time(name):
+                    return await func(*args, **kwargs)
+            except Exception:
+                errors.inc(kind, name)
+                raise
+
+        return wrapper
+
+    return decorator
+
+
+def cache_stats(size, hits, misses):
+    """Size, hit and miss counts and hit rate of an in-memory cache, as shown by /stats"""
+    lookups = hits + misses
+    return {
+        "size": size,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / lookups if lookups else 0.0,
+    }
+
+
+async def start_metrics_server(host=METRICS_HOST, port=METRICS_PORT):
+    """Serve the registry as Prometheus text on http://host:port/metrics
+
+    Returns:
+        aiohttp.web.AppRunner: Runner to clean up on shutdown, or None if disabled
+    """
+    if not port:
+        return None
+
+    # aiohttp.web is only needed when the endpoint is enabled, keep it out of startup otherwise
+    from aiohttp import web
+
+    async def handle_metrics(request):
+        return web.Response(text=registry.render(), content_type="text/plain")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, int(port)).start()
+    logger.info(f"Metrics served on http://{host}:{port}/metrics")
+    return runner
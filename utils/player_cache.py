@@ -0,0 +1,57 @@
+import collections
+import os
+import time
+from db.players import fetch_player
+from .metrics import cache_stats
+
+PLAYER_CACHE_SIZE = int(os.getenv("PLAYER_CACHE_SIZE", "4096"))
+# Seconds a cached player row (or "not registered") stays valid
+PLAYER_CACHE_TTL = float(os.getenv("PLAYER_CACHE_TTL", "900"))
+
+
+class PlayerCache:
+    """LRU cache of player rows keyed by Discord ID, with a time-to-live per entry.
+
+    Unregistered players are cached as None too; writes through `set` (e.g. from
+    /register) keep the cache coherent with the player table.
+    """
+
+    def __init__(self, maxsize=PLAYER_CACHE_SIZE, ttl=PLAYER_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()  # discord_id -> (expires at, player)
+
+    def __len__(self):
+        return len(self._entries)
+
+    async def get_player(self, discord_id):
+        """Player row for a Discord ID (None if not registered), loaded from the database on a miss"""
+        discord_id = str(discord_id)
+        entry = self._entries.get(discord_id)
+
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(discord_id)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        player = await fetch_player(discord_id)
+        self.set(discord_id, player)
+        return player
+
+    def set(self, discord_id, player):
+        """Store the current row of a player (None if not registered)"""
+        discord_id = str(discord_id)
+        self._entries[discord_id] = (time.monotonic() + self.ttl, player)
+        self._entries.move_to_end(discord_id)
+
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        return cache_stats(len(self), self.hits, self.misses)
+
+
+player_cache = PlayerCache()
@@ -0,0 +1,199 @@
+import asyncio
+import collections
+import hashlib
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from . import champion_tiles
+from .metrics import cache_stats
+
+# Attach a rendered image of both champion pools to ARAM session messages
+ARAM_POOL_IMAGE = os.getenv("ARAM_POOL_IMAGE", "false").lower() in ("1", "true")
+# Rendered pool images kept in memory, rerolls of the same pools reuse them
+POOL_IMAGE_CACHE_SIZE = int(os.getenv("POOL_IMAGE_CACHE_SIZE", "256"))
+# Threads rendering pool images, Pillow releases the GIL while resizing and encoding
+POOL_IMAGE_WORKERS = int(os.getenv("POOL_IMAGE_WORKERS", "2"))
+
+# Pixel sizes of the composite image
+TILE_SIZE = 48
+PADDING = 4
+TEAM_GAP = 12
+BACKGROUND = (32, 34, 37, 255)
+MISSING_TILE = (80, 80, 80, 255)
+
+
+logger = logging.getLogger("araminator")
+
+
+class SpriteAtlas:
+    """Every champion tile decoded once and scaled to TILE_SIZE, in a single image.
+
+    Tiles are laid out in one row in the order of `champion_ids`, so the tile of a
+    champion is a fixed box of the atlas. Champions without a tile on disk get a plain
+    placeholder.
+    """
+
+    def __init__(self, champion_ids, directory=champion_tiles.TILE_DIRECTORY):
+        # Pillow is optional, it's only needed when pool images are enabled
+        from PIL import Image
+
+        self.positions = {
+            champion_id: index for index, champion_id in enumerate(champion_ids)
+        }
+        self.image = Image.new(
+            "RGBA", (TILE_SIZE * max(len(self.positions), 1), TILE_SIZE), MISSING_TILE
+        )
+
+        missing = 0
+        for champion_id, index in self.positions.items():
+            try:
+                with Image.open(
+                    champion_tiles.tile_path(champion_id, directory)
+                ) as tile:
+                    tile = tile.convert("RGBA").resize(
+                        (TILE_SIZE, TILE_SIZE), Image.Resampling.LANCZOS
+                    )
+            except (OSError, ValueError):
+                missing += 1
+                continue
+            self.image.paste(tile, (index * TILE_SIZE, 0))
+
+        logger.info(
+            f"Sprite atlas built with {len(self.positions) - missing} champion tiles "
+            f"({missing} missing)."
+        )
+
+    def box(self, champion_id):
+        """Box of a champion's tile in the atlas, or None if the champion is unknown"""
+        index = self.positions.get(champion_id)
+        if index is None:
+            return None
+        return (index * TILE_SIZE, 0, (index + 1) * TILE_SIZE, TILE_SIZE)
+
+
+class PoolImageRenderer:
+    """Renders both teams' champion pools into one PNG, one row of tiles per team.
+
+    Rendering happens on a thread pool, never on the event loop, created on first use
+    so the threads only exist when pool images are enabled. Results are cached (LRU) by
+    a hash of the two pools, and the sprite atlas is built by `warm()` or the first
+    render and kept until `invalidate()` is called.
+    """
+
+    def __init__(self, maxsize=POOL_IMAGE_CACHE_SIZE, workers=POOL_IMAGE_WORKERS):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache = collections.OrderedDict()  # pool hash -> PNG bytes
+        self.workers = workers
+        self._executor = None
+        self._atlas = None
+        self._atlas_task = None
+
+    def invalidate(self):
+        """Drop the atlas and rendered images, e.g. after the tiles were updated"""
+        self._atlas = None
+        self._atlas_task = None
+        self._cache.clear()
+
+    async def warm(self, champion_ids):
+        """Build the sprite atlas ahead of the first render"""
+        try:
+            await self._get_atlas(champion_ids)
+        except Exception:
+            # The next render retries, the pools are listed as text until then
+            logger.exception("Could not build the sprite atlas.")
+
+    async def render(self, champion_ids, team_1_pool, team_2_pool):
+        """PNG of two champion pools
+
+        Args:
+            champion_ids (Iterable[str]): Ids of every champion, used to build the atlas on first use
+            team_1_pool (list[str]): Champion ids of Team 1's pool
+            team_2_pool (list[str]): Champion ids of Team 2's pool
+
+        Returns:
+            bytes: PNG image
+        """
+        key = self.pool_hash(team_1_pool, team_2_pool)
+        image = self._cache.get(key)
+        if image is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return image
+
+        self.misses += 1
+        loop = asyncio.get_running_loop()
+        atlas = await self._get_atlas(champion_ids)
+        image = await loop.run_in_executor(
+            self._get_executor(), self._compose, atlas, team_1_pool, team_2_pool
+        )
+
+        self._cache[key] = image
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+        return image
+
+    def stats(self):
+        return cache_stats(len(self._cache), self.hits, self.misses)
+
+    @staticmethod
+    def pool_hash(team_1_pool, team_2_pool):
+        pools = "\n".join((",".join(team_1_pool), ",".join(team_2_pool)))
+        return hashlib.blake2b(pools.encode(), digest_size=16).digest()
+
+    async def _get_atlas(self, champion_ids):
+        if self._atlas is not None:
+            return self._atlas
+
+        # Concurrent first renders share one atlas build
+        if self._atlas_task is None:
+            self._atlas_task = asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), SpriteAtlas, list(champion_ids)
+            )
+        task = self._atlas_task
+        try:
+            atlas = await task
+        except Exception:
+            # Let the next render build it again instead of failing forever
+            if self._atlas_task is task:
+                self._atlas_task = None
+            raise
+        if self._atlas_task is task:
+            self._atlas = atlas
+        return atlas
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="pool-image"
+            )
+        return self._executor
+
+    @staticmethod
+    def _compose(atlas, team_1_pool, team_2_pool):
+        from PIL import Image
+
+        columns = max(len(team_1_pool), len(team_2_pool), 1)
+        width = PADDING + columns * (TILE_SIZE + PADDING)
+        height = 2 * (TILE_SIZE + 2 * PADDING) + TEAM_GAP
+        image = Image.new("RGBA", (width, height), BACKGROUND)
+
+        for row, pool in enumerate((team_1_pool, team_2_pool)):
+            y = PADDING + row * (TILE_SIZE + 2 * PADDING + TEAM_GAP)
+            for column, champion_id in enumerate(pool):
+                x = PADDING + column * (TILE_SIZE + PADDING)
+                box = atlas.box(champion_id)
+                if box is None:
+                    image.paste(MISSING_TILE, (x, y, x + TILE_SIZE, y + TILE_SIZE))
+                else:
+                    image.paste(atlas.image.crop(box), (x, y))
+
+        output = io.BytesIO()
+        # Fast compression, the image is sent once and the cache keeps the bytes
+        image.save(output, format="PNG", compress_level=1)
+        return output.getvalue()
+
+
+pool_images = PoolImageRenderer()
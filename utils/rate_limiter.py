@@ -0,0 +1,244 @@
+import asyncio
+import collections
+import heapq
+import itertools
+import logging
+import os
+from enum import IntEnum
+
+# Application limits assumed until the first response tells us the real ones (development key defaults)
+RIOT_APP_RATE_LIMIT = os.getenv("RIOT_APP_RATE_LIMIT", "20:1,100:120")
+# Seconds to back off after a 429 that carries no Retry-After header
+DEFAULT_RETRY_AFTER = 1.0
+
+
+logger = logging.getLogger("araminator")
+
+
+class Priority(IntEnum):
+    """Queue priority of a Riot API call. Lower values are served first."""
+
+    INTERACTIVE = 0  # A user is waiting on the response, e.g. /register
+    BACKGROUND = 1  # Sync jobs, e.g. champion rotation refresh
+
+
+def parse_rate_limit_header(value):
+    """Parse a Riot rate limit header ("20:1,100:120") into [(20, 1), (100, 120)]"""
+    limits = []
+    if not value:
+        return limits
+
+    for part in value.split(","):
+        count, seconds = part.strip().split(":")
+        limits.append((int(count), int(seconds)))
+
+    return limits
+
+
+class _Window:
+    """Token bucket for a single `limit:seconds` window.
+
+    Each spent token is returned to the bucket `seconds` after it was spent, which
+    mirrors Riot's enforcement: never more than `limit` requests in any window.
+    """
+
+    __slots__ = ("limit", "seconds", "spent")
+
+    def __init__(self, limit, seconds):
+        self.limit = limit
+        self.seconds = seconds
+        self.spent = collections.deque()
+
+    def delay(self, now):
+        """Seconds until a token is available (0 if one is available now)"""
+        while self.spent and self.spent[0] + self.seconds <= now:
+            self.spent.popleft()
+
+        if len(self.spent) < self.limit:
+            return 0.0
+        return self.spent[len(self.spent) - self.limit] + self.seconds - now
+
+    def spend(self, now):
+        self.spent.append(now)
+
+    def sync_count(self, count, now):
+        """Account for requests the server has seen but we haven't (e.g. other processes using the key)"""
+        missing = count - len(self.spent)
+        for _ in range(missing):
+            self.spent.append(now)
+
+
+class _Scope:
+    """Set of windows that all have to allow a request, e.g. the app limit for one region"""
+
+    __slots__ = ("windows", "blocked_until")
+
+    def __init__(self, limits=()):
+        self.windows = [_Window(limit, seconds) for limit, seconds in limits]
+        self.blocked_until = 0.0
+
+    def delay(self, now):
+        delay = max(0.0, self.blocked_until - now)
+        for window in self.windows:
+            delay = max(delay, window.delay(now))
+        return delay
+
+    def spend(self, now):
+        for window in self.windows:
+            window.spend(now)
+
+    def update(self, limits, counts, now):
+        """Adopt the limits reported by the server, keeping track of tokens already spent"""
+        if limits and [(w.limit, w.seconds) for w in self.windows] != limits:
+            previous = {w.seconds: w.spent for w in self.windows}
+            self.windows = []
+            for limit, seconds in limits:
+                window = _Window(limit, seconds)
+                window.spent = previous.get(seconds, window.spent)
+                self.windows.append(window)
+
+        reported = dict((seconds, count) for count, seconds in counts)
+        for window in self.windows:
+            if window.seconds in reported:
+                window.sync_count(reported[window.seconds], now)
+
+
+class RateLimiter:
+    """Queues Riot API calls so they stay within the application and method rate limits.
+
+    Limits are tracked per routing region (application limits) and per region and
+    method (method limits), learned from the `X-App-Rate-Limit` and `X-Method-Rate-Limit`
+    response headers. Waiting callers are served in priority order, so interactive calls
+    jump ahead of queued background work.
+    """
+
+    def __init__(self, app_limits=RIOT_APP_RATE_LIMIT):
+        self._default_app_limits = parse_rate_limit_header(app_limits)
+        self._scopes = {}
+        self._waiters = {}  # region -> heap of (priority, sequence, method, future)
+        self._wakeups = {}  # region -> asyncio.Event set when the queue changes
+        self._dispatchers = {}  # region -> dispatcher task
+        self._sequence = itertools.count()
+
+    async def acquire(self, region, method, priority=Priority.INTERACTIVE):
+        """Wait until a request to `method` in `region` may be sent"""
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(
+            self._waiters.setdefault(region, []),
+            (priority, next(self._sequence), method, future),
+        )
+        self._wake(region)
+
+        await future
+
+    def update(self, region, method, headers):
+        """Learn limits and current counts from the headers of a Riot API response"""
+        now = asyncio.get_running_loop().time()
+
+        self._app_scope(region).update(
+            parse_rate_limit_header(headers.get("X-App-Rate-Limit")),
+            parse_rate_limit_header(headers.get("X-App-Rate-Limit-Count")),
+            now,
+        )
+        self._method_scope(region, method).update(
+            parse_rate_limit_header(headers.get("X-Method-Rate-Limit")),
+            parse_rate_limit_header(headers.get("X-Method-Rate-Limit-Count")),
+            now,
+        )
+        self._notify(region)
+
+    def penalize(self, region, method, headers):
+        """Block the scope a 429 response was issued for until its Retry-After has passed"""
+        now = asyncio.get_running_loop().time()
+
+        try:
+            retry_after = float(headers.get("Retry-After", DEFAULT_RETRY_AFTER))
+        except ValueError:
+            retry_after = DEFAULT_RETRY_AFTER
+
+        if headers.get("X-Rate-Limit-Type") == "application":
+            scope = self._app_scope(region)
+        else:
+            # Method and service limits only affect the one endpoint
+            scope = self._method_scope(region, method)
+
+        scope.blocked_until = max(scope.blocked_until, now + retry_after)
+        logger.warning(
+            f"Riot API rate limited ({headers.get('X-Rate-Limit-Type', 'service')}) "
+            f"for {region} {method}, backing off {retry_after}s."
+        )
+        self._notify(region)
+
+    def _app_scope(self, region):
+        key = (region,)
+        if key not in self._scopes:
+            self._scopes[key] = _Scope(self._default_app_limits)
+        return self._scopes[key]
+
+    def _method_scope(self, region, method):
+        key = (region, method)
+        if key not in self._scopes:
+            self._scopes[key] = _Scope()
+        return self._scopes[key]
+
+    def _notify(self, region):
+        """Make a running dispatcher re-evaluate its queue after limits changed"""
+        if region in self._dispatchers:
+            self._wakeups[region].set()
+
+    def _wake(self, region):
+        wakeup = self._wakeups.setdefault(region, asyncio.Event())
+        wakeup.set()
+
+        if region not in self._dispatchers:
+            self._dispatchers[region] = asyncio.create_task(self._dispatch(region))
+
+    async def _dispatch(self, region):
+        """Hand out tokens for one region until its queue is empty"""
+        loop = asyncio.get_running_loop()
+        waiters = self._waiters[region]
+        wakeup = self._wakeups[region]
+        app_scope = self._app_scope(region)
+
+        try:
+            while True:
+                # Drop callers that gave up (cancelled) while waiting
+                waiters[:] = [entry for entry in waiters if not entry[3].done()]
+                heapq.heapify(waiters)
+                if not waiters:
+                    break
+
+                wakeup.clear()
+                now = loop.time()
+                timeout = app_scope.delay(now)
+
+                if timeout <= 0:
+                    # Serve the highest priority caller whose method limit has room
+                    granted = False
+                    timeout = None
+                    for entry in sorted(waiters):
+                        _, _, method, future = entry
+                        method_scope = self._method_scope(region, method)
+                        method_delay = method_scope.delay(now)
+
+                        if method_delay <= 0:
+                            app_scope.spend(now)
+                            method_scope.spend(now)
+                            future.set_result(None)
+                            waiters.remove(entry)
+                            granted = True
+                            break
+
+                        timeout = (
+                            method_delay if timeout is None else min(timeout, method_delay)
+                        )
+
+                    if granted:
+                        continue
+
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            del self._dispatchers[region]
@@ -1,28 +1,101 @@
+import asyncio
+import collections
+import logging
 import os
-import requests
-from dotenv import load_dotenv
-from .exceptions import InvalidRiotIDFormatError
+import time
+from . import champion_tiles, http_client, metrics
+from .exceptions import InvalidRiotIDFormatError, RiotAPIError
+from .rate_limiter import Priority, RateLimiter
+from .riot_id_cache import riot_id_cache
 from enum import Enum
 from typing import Literal
-from urllib3.exceptions import NameResolutionError
-from requests.exceptions import ConnectionError
-
-load_dotenv()
+from urllib.parse import urlencode
 
 RIOT_API_KEY = os.getenv("RIOT_API_KEY")
+# Base URLs, overridable to point the bot at a local stub server (e.g. for benchmarks)
+RIOT_API_BASE_URL = os.getenv("RIOT_API_BASE_URL", "https://{region}.api.riotgames.com")
+DDRAGON_BASE_URL = os.getenv("DDRAGON_BASE_URL", "https://ddragon.leagueoflegends.com")
+# How many times a call is re-queued after being rate limited before giving up
+RIOT_MAX_RATE_LIMIT_RETRIES = int(os.getenv("RIOT_MAX_RATE_LIMIT_RETRIES", "5"))
+
+# Match IDs per match-v5 page, 100 is the maximum Riot allows
+MATCH_IDS_PAGE_SIZE = 100
+
+# Maximum number of champion tiles downloaded at the same time
+TILE_DOWNLOAD_CONCURRENCY = int(os.getenv("TILE_DOWNLOAD_CONCURRENCY", "16"))
+
+rate_limiter = RateLimiter()
+
+logger = logging.getLogger("araminator")
 
 type RegionAbbreviations = Literal["EUW1", "NA1"]
 
 
-def get_puuid_from_riot_id(
+async def riot_get(region, method, path, priority=Priority.INTERACTIVE):
+    """Send a rate limited GET request to the Riot API.
+
+    Waits in the rate limiter queue for a token before every attempt, including the
+    HTTP client's retries after 5xx responses and connection errors, learns the current
+    limits from the response and re-queues the call if it was rate limited anyway (429).
+
+    Args:
+        region (str): Routing value used as host, e.g. "europe" or "euw1"
+        method (str): Name of the endpoint, used as key for its method rate limit
+        path (str): Request path starting with /
+        priority (Priority, optional): Queue priority. Defaults to Priority.INTERACTIVE.
+
+    Returns:
+        Response: The first response that was not rate limited
+    """
+    url = RIOT_API_BASE_URL.format(region=region) + path
+    headers = {"X-Riot-Token": RIOT_API_KEY}
+
+    async def acquire():
+        await rate_limiter.acquire(region, method, priority)
+
+    for _ in range(RIOT_MAX_RATE_LIMIT_RETRIES + 1):
+        await acquire()
+        response = await timed_get(method, url, headers=headers, before_retry=acquire)
+        rate_limiter.update(region, method, response.headers)
+
+        if response.status != 429:
+            return response
+
+        rate_limiter.penalize(region, method, response.headers)
+
+    raise RiotAPIError(response.status, url, response.text)
+
+
+async def timed_get(endpoint, url, headers=None, before_retry=None):
+    """GET through the shared HTTP client, recording its duration per endpoint and status"""
+    start = time.perf_counter()
+    status = "error"
+    try:
+        response = await http_client.get(
+            url, headers=headers, before_retry=before_retry
+        )
+        status = response.status
+        return response
+    finally:
+        metrics.riot_latency.observe(time.perf_counter() - start, endpoint, status)
+        if status == "error" or status >= 500:
+            metrics.errors.inc("riot", endpoint)
+
+
+async def get_puuid_from_riot_id(
     riot_id: str,
     region="europe",
+    priority=Priority.INTERACTIVE,
 ):
     """Fetch account PUUID from Riot API
 
+    Resolutions (including Riot IDs that could not be found) are cached, so
+    re-registrations and retried typos don't spend rate limit budget.
+
     Args:
         riot_id (str): Riot ID (Game name and Tagline)
         region (str, optional): Riot region (americas, europe, asia, esports). Defaults to "europe".
+        priority (Priority, optional): Rate limiter queue priority. Defaults to Priority.INTERACTIVE.
 
     Returns:
         dict: Dictionary containing Riot ID (Game name and Tag line) and PUUID, or None if nothing is found
@@ -35,71 +108,165 @@ def get_puuid_from_riot_id(
             f"**{riot_id}** has an invalid Riot ID format. Make sure the Summoner Name and Tag are separated by #."
         )
 
-    url = f"https://{region}.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line.upper()}"
-    headers = {"X-Riot-Token": RIOT_API_KEY}
+    found, account = await riot_id_cache.get(game_name, tag_line, region)
+    if found:
+        return account
 
-    response = requests.get(url, headers=headers)
+    response = await riot_get(
+        region,
+        "account-v1.by-riot-id",
+        f"/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line.upper()}",
+        priority,
+    )
 
-    if response.status_code == 200:
-        data = response.json()
-        return {
-            "puuid": data["puuid"],
-            "gameName": data["gameName"],
-            "tagLine": data["tagLine"],
-        }
-    elif response.status_code == 404:
+    if response.status == 200:
+        account = _account_from_response(response)
+        await riot_id_cache.set(game_name, tag_line, region, account)
+        return account
+    elif response.status == 404:
+        riot_id_cache.set_missing(game_name, tag_line, region)
         return None  # Summoner not found
     else:
-        raise Exception(f"Error {response.status_code}, {url}: {response.text}")
+        raise RiotAPIError(response.status, response.url, response.text)
 
 
-def fetch_champion_data():
-    patches = requests.get("https://ddragon.leagueoflegends.com/api/versions.json")
-    latest_patch = patches.json()[0]
+def _account_from_response(response):
+    data = response.json()
+    return {
+        "puuid": data["puuid"],
+        "gameName": data["gameName"],
+        "tagLine": data["tagLine"],
+    }
 
-    url = f"https://ddragon.leagueoflegends.com/cdn/{latest_patch}/data/en_US/champion.json"
-    try:
-        response = requests.get(url)
-    except (NameResolutionError, ConnectionError):
-        raise
 
-    if response.status_code == 200:
+async def fetch_latest_patch():
+    """Fetch the latest Data Dragon patch version, e.g. "15.1.1" """
+    response = await timed_get(
+        "ddragon.versions", f"{DDRAGON_BASE_URL}/api/versions.json"
+    )
+
+    if response.status != 200:
+        raise RiotAPIError(response.status, response.url, response.text)
+
+    return response.json()[0]
+
+
+async def fetch_champion_data(patch=None):
+    """Fetch the Data Dragon champion data for a patch (latest if omitted)"""
+    if patch is None:
+        patch = await fetch_latest_patch()
+
+    url = f"{DDRAGON_BASE_URL}/cdn/{patch}/data/en_US/champion.json"
+    response = await timed_get("ddragon.champions", url)
+
+    if response.status == 200:
         data = response.json()
         return data["data"]
-    elif response.status_code == 404:
+    elif response.status == 404:
         return None
     else:
-        raise Exception(f"Error {response.status_code}, {url}: {response.text}")
+        raise RiotAPIError(response.status, url, response.text)
 
 
-def fetch_free_champion_rotation(region):
-    url = f"https://{region}.api.riotgames.com/lol/platform/v3/champion-rotations"
-    headers = {"X-Riot-Token": RIOT_API_KEY}
-
-    try:
-        response = requests.get(url, headers=headers)
-    except (NameResolutionError, ConnectionError):
-        raise
+async def fetch_free_champion_rotation(region, priority=Priority.BACKGROUND):
+    response = await riot_get(
+        region,
+        "champion-v3.rotations",
+        "/lol/platform/v3/champion-rotations",
+        priority,
+    )
 
-    if response.status_code == 200:
+    if response.status == 200:
         data = response.json()
         return data
-    elif response.status_code == 404:
+    elif response.status == 404:
+        return None
+    else:
+        raise RiotAPIError(response.status, response.url, response.text)
+
+
+async def fetch_match_ids(
+    puuid, region="europe", start_time=None, queue=None, priority=Priority.BACKGROUND
+):
+    """Fetch the IDs of all matches of a player, newest first
+
+    Args:
+        puuid (str): Account PUUID
+        region (str, optional): Riot region (americas, europe, asia, esports). Defaults to "europe".
+        start_time (int, optional): Only matches started at or after this epoch timestamp (seconds).
+        queue (int, optional): Only matches of this queue ID, e.g. 0 for custom games.
+        priority (Priority, optional): Rate limiter queue priority. Defaults to Priority.BACKGROUND.
+
+    Returns:
+        list: Match IDs
+    """
+    match_ids = []
+    query = {"count": MATCH_IDS_PAGE_SIZE}
+    if start_time is not None:
+        query["startTime"] = int(start_time)
+    if queue is not None:
+        query["queue"] = queue
+
+    # Pages are requested until one comes back short
+    while True:
+        query["start"] = len(match_ids)
+        response = await riot_get(
+            region,
+            "match-v5.ids-by-puuid",
+            f"/lol/match/v5/matches/by-puuid/{puuid}/ids?{urlencode(query)}",
+            priority,
+        )
+        if response.status != 200:
+            raise RiotAPIError(response.status, response.url, response.text)
+
+        page = response.json()
+        match_ids.extend(page)
+        if len(page) < MATCH_IDS_PAGE_SIZE:
+            return match_ids
+
+
+async def fetch_match(match_id, region="europe", priority=Priority.BACKGROUND):
+    """Fetch a match (metadata and info) from match-v5
+
+    Returns:
+        dict: The match, or None if it doesn't exist
+    """
+    response = await riot_get(
+        region,
+        "match-v5.match",
+        f"/lol/match/v5/matches/{match_id}",
+        priority,
+    )
+
+    if response.status == 200:
+        return response.json()
+    elif response.status == 404:
         return None
     else:
-        raise Exception(f"Error {response.status_code}, {url}: {response.text}")
+        raise RiotAPIError(response.status, response.url, response.text)
 
 
-def fetch_condensed_champion_data():
-    """Fetches all champion data, but condenses it down to id, name, key and sprite"""
-    champion_data = fetch_champion_data()
+async def fetch_condensed_champion_data(champion_data=None):
+    """Fetches all champion data, but condenses it down to id, name, key, sprite and tags
 
+    Args:
+        champion_data (dict, optional): Already fetched champion data. Fetched for the latest patch if omitted.
+    """
+    if champion_data is None:
+        champion_data = await fetch_champion_data()
+
+    return condense_champion_data(champion_data)
+
+
+def condense_champion_data(champion_data):
+    """Condense Data Dragon champion data (the "data" object of champion.json) down to id, name, key, sprite and tags"""
     condensed_data = [
         {
             "id": d["id"],
             "name": d["name"],
             "key": d["key"],
             "sprite": f"{d["id"]}.png",
+            "tags": ",".join(d["tags"]),
         }
         for d in champion_data.values()
     ]
@@ -107,32 +274,67 @@ def fetch_condensed_champion_data():
     return condensed_data
 
 
-def fetch_champion_tile_images():
-    patches = requests.get("https://ddragon.leagueoflegends.com/api/versions.json")
-    latest_patch = patches.json()[0]
+async def fetch_champion_tile_images(
+    patch=None, champion_data=None, concurrency=TILE_DOWNLOAD_CONCURRENCY
+):
+    """Download champion square/tile images that are missing or outdated
 
-    champions = fetch_champion_data()
+    Tiles already synced for the patch (according to the manifest in the tile directory)
+    are skipped, downloads run concurrently and files are only rewritten when their content changed.
 
-    square_image_base_url = (
-        f"https://ddragon.leagueoflegends.com/cdn/{latest_patch}/img/champion/"
-    )
+    Args:
+        patch (str, optional): Data Dragon patch. Defaults to the latest patch.
+        champion_data (dict, optional): Already fetched champion data for `patch`.
+        concurrency (int, optional): Maximum simultaneous downloads. Defaults to TILE_DOWNLOAD_CONCURRENCY.
 
-    save_path = "assets/images/champion_squares/"
-    os.makedirs(save_path, exist_ok=True)
+    Returns:
+        dict: Number of tiles per outcome (written, unchanged, skipped, failed)
+    """
+    if patch is None:
+        patch = await fetch_latest_patch()
+    if champion_data is None:
+        champion_data = await fetch_champion_data(patch)
 
-    try:
-        champions = fetch_champion_data()
-
-        for champ_data in champions.values():
-            champ_name = champ_data["id"]
-            img_response = requests.get(f"{square_image_base_url}{champ_name}.png")
-
-            if img_response.status_code == 200:
-                img_path = os.path.join(save_path, f"{champ_name}.png")
-                with open(img_path, "wb") as img_file:
-                    img_file.write(img_response.content)
-                print(f"Downloaded {champ_name}.png")
-            else:
-                print(f"Failed to download {champ_name}.png")
-    except (NameResolutionError, ConnectionError) as e:
-        raise
+    square_image_base_url = f"{DDRAGON_BASE_URL}/cdn/{patch}/img/champion/"
+
+    manifest = await asyncio.to_thread(champion_tiles.load_manifest)
+    summary = collections.Counter(written=0, unchanged=0, skipped=0, failed=0)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def sync_tile(champ_name):
+        if champion_tiles.is_current(manifest, champ_name, patch):
+            summary["skipped"] += 1
+            return
+
+        try:
+            async with semaphore:
+                img_response = await timed_get(
+                    "ddragon.champion-tile", f"{square_image_base_url}{champ_name}.png"
+                )
+        except Exception as e:
+            logger.warning(f"Failed to download {champ_name}.png: {e!r}")
+            summary["failed"] += 1
+            return
+
+        if img_response.status != 200:
+            logger.warning(
+                f"Failed to download {champ_name}.png (status {img_response.status})"
+            )
+            summary["failed"] += 1
+            return
+
+        status = await asyncio.to_thread(
+            champion_tiles.store_tile, manifest, champ_name, img_response.body, patch
+        )
+        summary[status] += 1
+
+    await asyncio.gather(*(sync_tile(d["id"]) for d in champion_data.values()))
+
+    manifest["patch"] = patch
+    await asyncio.to_thread(champion_tiles.save_manifest, manifest)
+
+    logger.info(
+        f"Champion tiles synced for patch {patch}: "
+        + ", ".join(f"{count} {status}" for status, count in summary.items())
+    )
+    return dict(summary)
@@ -0,0 +1,121 @@
+import collections
+import os
+import time
+from db.players import fetch_riot_account, save_riot_account
+from .metrics import cache_stats
+
+RIOT_ID_CACHE_SIZE = int(os.getenv("RIOT_ID_CACHE_SIZE", "4096"))
+# Seconds a resolved Riot ID stays valid, Riot IDs only change when an account is renamed
+RIOT_ID_CACHE_TTL = float(os.getenv("RIOT_ID_CACHE_TTL", "86400"))
+# Seconds a Riot ID that could not be found (404) is remembered as missing
+RIOT_ID_NEGATIVE_TTL = float(os.getenv("RIOT_ID_NEGATIVE_TTL", "300"))
+
+
+def normalize_riot_id(game_name, tag_line):
+    """Cache key of a Riot ID, Riot IDs are case-insensitive"""
+    return f"{game_name.strip()}#{tag_line.strip()}".casefold()
+
+
+class RiotIDCache:
+    """Two-tier cache of Riot ID -> PUUID resolutions.
+
+    The in-memory LRU tier answers repeated lookups without awaiting anything, the
+    riot_account table keeps resolutions across restarts. Riot IDs that could not be
+    found are only cached in memory and for a short time, so a typo retried right away
+    costs no rate limit budget while a newly created account is found soon after.
+    """
+
+    def __init__(
+        self,
+        maxsize=RIOT_ID_CACHE_SIZE,
+        ttl=RIOT_ID_CACHE_TTL,
+        negative_ttl=RIOT_ID_NEGATIVE_TTL,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()  # (riot_id_key, region) -> (expires at, account)
+        # puuid -> (expires at, account), to forget the old Riot ID of a renamed account
+        self._by_puuid = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    async def get(self, game_name, tag_line, region):
+        """Cached resolution of a Riot ID
+
+        Returns:
+            tuple: (found, account). `found` is False on a cache miss, account is None for
+                Riot IDs that are cached as not found.
+        """
+        key = (normalize_riot_id(game_name, tag_line), region)
+        entry = self._get_entry(self._entries, key)
+
+        if entry is None:
+            account = await fetch_riot_account(*key, time.time() - self.ttl)
+            if account is not None:
+                self._remember(key, account, self.ttl)
+                entry = (None, account)
+
+        if entry is None:
+            self.misses += 1
+            return False, None
+
+        self.hits += 1
+        return True, entry[1]
+
+    async def set(self, game_name, tag_line, region, account):
+        """Store the account a Riot ID resolved to, in both tiers"""
+        key = (normalize_riot_id(game_name, tag_line), region)
+        self._remember(key, account, self.ttl)
+        await save_riot_account(*key, account, int(time.time()))
+
+    def set_missing(self, game_name, tag_line, region):
+        """Remember that a Riot ID could not be found"""
+        key = (normalize_riot_id(game_name, tag_line), region)
+        self._remember(key, None, self.negative_ttl)
+
+    def stats(self):
+        return cache_stats(len(self), self.hits, self.misses)
+
+    def _get_entry(self, entries, key):
+        entry = entries.get(key)
+        if entry is None:
+            return None
+
+        if entry[0] <= time.monotonic():
+            del entries[key]
+            return None
+
+        entries.move_to_end(key)
+        return entry
+
+    def _remember(self, key, account, ttl):
+        if account is not None:
+            # A renamed account no longer answers to its old Riot ID
+            previous = self._get_entry(self._by_puuid, account["puuid"])
+            if previous is not None:
+                previous_key = (
+                    normalize_riot_id(previous[1]["gameName"], previous[1]["tagLine"]),
+                    key[1],
+                )
+                if previous_key != key:
+                    self._entries.pop(previous_key, None)
+            self._remember_puuid(account, ttl)
+
+        self._store(self._entries, key, (time.monotonic() + ttl, account))
+
+    def _remember_puuid(self, account, ttl):
+        self._store(self._by_puuid, account["puuid"], (time.monotonic() + ttl, account))
+
+    def _store(self, entries, key, entry):
+        entries[key] = entry
+        entries.move_to_end(key)
+
+        while len(entries) > self.maxsize:
+            entries.popitem(last=False)
+
+
+riot_id_cache = RiotIDCache()
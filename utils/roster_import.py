@@ -0,0 +1,223 @@
+"""Register many players at once from a roster of `discord_id,riot_id[,region]` lines.
+
+Usage: python -m utils.roster_import path/to/roster.csv
+"""
+
+import asyncio
+import csv
+import io
+import logging
+import os
+import re
+import sys
+from dotenv import load_dotenv
+
+if __name__ == "__main__":
+    # Read .env before the modules below read their configuration on import
+    load_dotenv()
+
+from db.database import close_db, init_db
+from db.players import fetch_players_by_riot_accounts, save_players
+from . import http_client
+from .exceptions import RiotAccountTakenError
+from .player_cache import player_cache
+from .rate_limiter import Priority
+from .riot_api import get_puuid_from_riot_id
+
+# Maximum Riot ID lookups in flight, the rate limiter still paces the actual requests
+ROSTER_RESOLVE_CONCURRENCY = int(os.getenv("ROSTER_RESOLVE_CONCURRENCY", "10"))
+
+REGIONS = ("europe", "americas", "asia", "esports")
+DISCORD_ID_PATTERN = re.compile(r"^\d{15,20}$")
+# Game names are 3-16 characters, taglines 3-5 letters or digits
+RIOT_ID_PATTERN = re.compile(r"^[^#]{3,16}#[0-9A-Za-z]{3,5}$")
+REPORT_FIELDS = ("line", "discord_id", "riot_id", "region", "status", "detail")
+
+
+logger = logging.getLogger("araminator")
+
+
+def parse_roster(text, default_region="europe"):
+    """Parse and validate a roster, one `discord_id,riot_id[,region]` entry per line
+
+    Lines may also be tab or semicolon separated, a header line and blank lines are skipped.
+    Later entries for the same Discord ID or Riot ID are reported as duplicates.
+
+    Returns:
+        list[dict]: One row per entry with line, discord_id, riot_id, region, status and detail.
+            Valid rows have status "pending".
+    """
+    rows = []
+    seen_discord_ids = {}
+    seen_riot_ids = {}
+
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+
+        delimiter = "\t" if "\t" in line else ";" if ";" in line else ","
+        fields = [field.strip() for field in next(csv.reader([line], delimiter=delimiter))]
+        fields += [""] * (3 - len(fields))
+        discord_id, riot_id, region = fields[:3]
+        region = region.lower() or default_region
+
+        if line_number == 1 and not discord_id.isdigit():
+            continue  # Header
+
+        row = {
+            "line": line_number,
+            "discord_id": discord_id,
+            "riot_id": riot_id,
+            "region": region,
+            "status": "pending",
+            "detail": "",
+        }
+        rows.append(row)
+
+        normalized_riot_id = riot_id.casefold()
+        if not DISCORD_ID_PATTERN.match(discord_id):
+            row.update(status="invalid", detail="Discord ID must be a numeric user ID")
+        elif not RIOT_ID_PATTERN.match(riot_id):
+            row.update(status="invalid", detail="Riot ID must look like Name#TAG")
+        elif region not in REGIONS:
+            row.update(status="invalid", detail=f"Region must be one of {', '.join(REGIONS)}")
+        elif discord_id in seen_discord_ids:
+            row.update(
+                status="duplicate",
+                detail=f"Discord ID already on line {seen_discord_ids[discord_id]}",
+            )
+        elif normalized_riot_id in seen_riot_ids:
+            row.update(
+                status="duplicate",
+                detail=f"Riot ID already on line {seen_riot_ids[normalized_riot_id]}",
+            )
+        else:
+            seen_discord_ids[discord_id] = line_number
+            seen_riot_ids[normalized_riot_id] = line_number
+
+    return rows
+
+
+async def import_roster(text, default_region="europe"):
+    """Validate a roster, resolve its Riot IDs concurrently and register all found players in one transaction
+
+    Returns:
+        list[dict]: Per-row report, see parse_roster. Status ends up as registered, not_found,
+            invalid, duplicate, conflict or error.
+    """
+    rows = parse_roster(text, default_region)
+    semaphore = asyncio.Semaphore(ROSTER_RESOLVE_CONCURRENCY)
+
+    async def resolve(row):
+        async with semaphore:
+            try:
+                account = await get_puuid_from_riot_id(
+                    row["riot_id"], row["region"], priority=Priority.BACKGROUND
+                )
+            except Exception as e:  # Report the row instead of failing the whole import
+                row.update(status="error", detail=str(e))
+                return None
+
+        if account is None:
+            row.update(status="not_found", detail="Riot ID could not be found")
+            return None
+
+        return {
+            "discord_id": row["discord_id"],
+            "riot_game_name": account["gameName"],
+            "riot_game_tagline": account["tagLine"],
+            "riot_puuid": account["puuid"],
+        }
+
+    pending = [row for row in rows if row["status"] == "pending"]
+    resolved = await asyncio.gather(*(resolve(row) for row in pending))
+
+    found = [(row, player) for row, player in zip(pending, resolved) if player]
+    await find_conflicts(found)
+
+    players = [(row, player) for row, player in found if row["status"] != "conflict"]
+    for row, player in players:
+        row.update(
+            status="registered",
+            detail=f"{player['riot_game_name']}#{player['riot_game_tagline']}",
+        )
+
+    if players:
+        try:
+            await save_players([player for _, player in players])
+        except RiotAccountTakenError as e:
+            # Someone registered one of the accounts in the meantime
+            for row, _ in players:
+                row.update(status="error", detail=str(e))
+            players = []
+
+        for _, player in players:
+            player_cache.set(player["discord_id"], player)
+
+    logger.info(f"Imported roster: {len(players)} of {len(rows)} entries registered.")
+    return rows
+
+
+async def find_conflicts(found):
+    """Mark rows whose Riot account or game name is taken with status "conflict"
+
+    A game name or PUUID is taken if it is linked to another Discord user, either in
+    the player table or by an earlier row of the roster. Game names are compared
+    case-insensitively, like MySQL's default collation does.
+
+    Args:
+        found (list[tuple]): (report row, resolved player) pairs
+    """
+    existing = await fetch_players_by_riot_accounts(
+        {player["riot_puuid"] for _, player in found},
+        {player["riot_game_name"] for _, player in found},
+    )
+    puuid_owners = {row["riot_puuid"]: row["discord_id"] for row in existing}
+    name_owners = {
+        row["riot_game_name"].casefold(): row["discord_id"] for row in existing
+    }
+
+    for row, player in found:
+        name = player["riot_game_name"].casefold()
+        owner = puuid_owners.get(player["riot_puuid"], player["discord_id"])
+        if owner == player["discord_id"]:
+            owner = name_owners.get(name, player["discord_id"])
+
+        if owner != player["discord_id"]:
+            row.update(status="conflict", detail=f"Riot account already linked to {owner}")
+            continue
+
+        puuid_owners[player["riot_puuid"]] = player["discord_id"]
+        name_owners[name] = player["discord_id"]
+
+
+def format_report(rows):
+    """Per-row import report as CSV text"""
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=REPORT_FIELDS)
+    writer.writeheader()
+    writer.writerows(rows)
+    return output.getvalue()
+
+
+async def main(path):
+    with open(path, encoding="utf-8") as roster_file:
+        text = roster_file.read()
+
+    await init_db()
+    try:
+        rows = await import_roster(text)
+    finally:
+        await http_client.close_session()
+        await close_db()
+
+    print(format_report(rows), end="")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print(__doc__.strip())
+        sys.exit(1)
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(sys.argv[1]))
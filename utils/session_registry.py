@@ -0,0 +1,84 @@
+import os
+import time
+from .exceptions import SessionLimitError
+
+ARAM_MAX_SESSIONS_PER_GUILD = int(os.getenv("ARAM_MAX_SESSIONS_PER_GUILD", "5"))
+# Seconds without any interaction after which a session is ended automatically
+ARAM_SESSION_IDLE_TIMEOUT = float(os.getenv("ARAM_SESSION_IDLE_TIMEOUT", "7200"))
+
+
+class SessionRegistry:
+    """Active ARAM sessions keyed by (guild ID, channel ID), one session per channel.
+
+    Sessions are the `ARAMView`s themselves; they are expected to have `guild_id`,
+    `channel_id` and `last_activity` (time.monotonic()) attributes.
+    """
+
+    def __init__(
+        self,
+        max_sessions_per_guild=ARAM_MAX_SESSIONS_PER_GUILD,
+        idle_timeout=ARAM_SESSION_IDLE_TIMEOUT,
+    ):
+        self.max_sessions_per_guild = max_sessions_per_guild
+        self.idle_timeout = idle_timeout
+        self._sessions = {}
+        self._sessions_per_guild = {}
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __iter__(self):
+        return iter(list(self._sessions.values()))
+
+    def get(self, guild_id, channel_id):
+        return self._sessions.get((guild_id, channel_id))
+
+    def guild_session_count(self, guild_id):
+        return self._sessions_per_guild.get(guild_id, 0)
+
+    def add(self, session):
+        """Register a session for its channel
+
+        Raises:
+            SessionLimitError: If the channel already has a session or the guild is at its session cap
+        """
+        key = (session.guild_id, session.channel_id)
+
+        if key in self._sessions:
+            raise SessionLimitError("An ARAM session is already active in this channel!")
+
+        if self.guild_session_count(session.guild_id) >= self.max_sessions_per_guild:
+            raise SessionLimitError(
+                f"This server already has {self.max_sessions_per_guild} active ARAM sessions. End one first!"
+            )
+
+        self._sessions[key] = session
+        self._sessions_per_guild[session.guild_id] = (
+            self.guild_session_count(session.guild_id) + 1
+        )
+
+    def remove(self, guild_id, channel_id):
+        """Unregister and return the session of a channel, or None if there is none"""
+        session = self._sessions.pop((guild_id, channel_id), None)
+
+        if session is not None:
+            remaining = self._sessions_per_guild[guild_id] - 1
+            if remaining:
+                self._sessions_per_guild[guild_id] = remaining
+            else:
+                del self._sessions_per_guild[guild_id]
+
+        return session
+
+    def pop_idle(self):
+        """Unregister and return every session idle for longer than idle_timeout"""
+        cutoff = time.monotonic() - self.idle_timeout
+        idle = [
+            session for session in self._sessions.values()
+            if session.last_activity < cutoff
+        ]
+
+        for session in idle:
+            self.remove(session.guild_id, session.channel_id)
+
+        return idle
@@ -0,0 +1,158 @@
+import bisect
+import heapq
+import itertools
+import random
+
+DEFAULT_RATING = 1500
+ELO_K_FACTOR = 32
+# Lobbies up to this size are split by exhaustive search (at most C(10, 5) = 252 splits)
+EXACT_SPLIT_LIMIT = 10
+# Maximum improving swaps applied after differencing, each costs O(n log n)
+MAX_REFINEMENT_SWAPS = 32
+
+
+def expected_score(rating, opponent_rating):
+    """Elo win expectancy of `rating` against `opponent_rating`"""
+    return 1 / (1 + 10 ** ((opponent_rating - rating) / 400))
+
+
+def elo_changes(team_1_ratings, team_2_ratings, team_1_won, k_factor=ELO_K_FACTOR):
+    """Rating change per player after a game, based on the average rating of each team
+
+    Args:
+        team_1_ratings (dict): Player ID -> rating for team 1
+        team_2_ratings (dict): Player ID -> rating for team 2
+        team_1_won (bool): Whether team 1 won the game
+        k_factor (int, optional): Maximum rating change per game. Defaults to ELO_K_FACTOR.
+
+    Returns:
+        dict: Player ID -> rating change (positive for the winners)
+    """
+    team_1_average = sum(team_1_ratings.values()) / len(team_1_ratings)
+    team_2_average = sum(team_2_ratings.values()) / len(team_2_ratings)
+
+    score = 1 if team_1_won else 0
+    change = round(k_factor * (score - expected_score(team_1_average, team_2_average)))
+
+    return {
+        **{player: change for player in team_1_ratings},
+        **{player: -change for player in team_2_ratings},
+    }
+
+
+def balance_teams(ratings, tolerance=0, rng=random):
+    """Split players into two teams of (near) equal size with (near) equal total rating
+
+    Lobbies up to EXACT_SPLIT_LIMIT players are solved exactly; larger lobbies use
+    balanced Karmarkar-Karp differencing followed by a few improving swaps, all O(n log n).
+
+    Args:
+        ratings (dict): Player ID -> rating
+        tolerance (int, optional): Splits whose rating difference is within `tolerance` of the
+            best one are considered equally balanced and picked from at random. Defaults to 0.
+        rng (random.Random, optional): Source of randomness. Defaults to the random module.
+
+    Returns:
+        tuple: (team 1 player IDs, team 2 player IDs)
+    """
+    players = list(ratings)
+    rng.shuffle(players)  # Random order among equal ratings
+
+    if len(players) <= EXACT_SPLIT_LIMIT:
+        team_1, team_2 = _exact_split(players, ratings, tolerance, rng)
+    else:
+        team_1, team_2 = _differencing_split(players, ratings)
+        _refine_by_swaps(team_1, team_2, ratings)
+
+    # Either team may end up with the extra player or the higher total
+    if rng.random() < 0.5:
+        team_1, team_2 = team_2, team_1
+
+    return team_1, team_2
+
+
+def _exact_split(players, ratings, tolerance, rng):
+    """Try every split with team sizes n // 2 and n - n // 2"""
+    if not players:
+        return [], []
+
+    total = sum(ratings[player] for player in players)
+    size = len(players) // 2
+
+    # For an even lobby, fixing the first player in team 2 skips each split's mirror image
+    rest = players[1:] if len(players) % 2 == 0 else players
+    splits = [
+        (abs(total - 2 * sum(ratings[player] for player in team_1)), team_1)
+        for team_1 in itertools.combinations(rest, size)
+    ]
+
+    best_difference = min(difference for difference, _ in splits)
+    _, team_1 = rng.choice(
+        [split for split in splits if split[0] <= best_difference + tolerance]
+    )
+    in_team_1 = set(team_1)
+    return list(team_1), [player for player in players if player not in in_team_1]
+
+
+def _differencing_split(players, ratings):
+    """Balanced Karmarkar-Karp: pair neighbouring ratings, then repeatedly merge the two
+    partial splits with the largest differences, setting one against the other"""
+    ordered = sorted(players, key=lambda player: ratings[player], reverse=True)
+    if len(ordered) % 2 == 1:
+        ordered.append(None)  # Phantom player with rating 0, the team it lands in is one short
+
+    def rating(player):
+        return 0 if player is None else ratings[player]
+
+    # Heap of partial splits (-difference, tiebreak, heavier side, lighter side)
+    tiebreak = itertools.count()
+    heap = [
+        (-(rating(heavy) - rating(light)), next(tiebreak), [heavy], [light])
+        for heavy, light in zip(ordered[::2], ordered[1::2])
+    ]
+    heapq.heapify(heap)
+
+    while len(heap) > 1:
+        difference_1, _, heavy_1, light_1 = heapq.heappop(heap)
+        difference_2, _, heavy_2, light_2 = heapq.heappop(heap)
+        heavy_1.extend(light_2)
+        light_1.extend(heavy_2)
+        heapq.heappush(
+            heap, (difference_1 - difference_2, next(tiebreak), heavy_1, light_1)
+        )
+
+    _, _, team_1, team_2 = heap[0]
+    return (
+        [player for player in team_1 if player is not None],
+        [player for player in team_2 if player is not None],
+    )
+
+
+def _refine_by_swaps(team_1, team_2, ratings):
+    """Swap single players between the teams (in place) while that reduces the rating difference"""
+    difference = sum(ratings[p] for p in team_1) - sum(ratings[p] for p in team_2)
+
+    for _ in range(MAX_REFINEMENT_SWAPS):
+        if difference == 0:
+            return
+
+        # Swapping a (team 1) with b (team 2) changes the difference by 2 * (b - a),
+        # so for every a the best partner is the b closest to a - difference / 2
+        team_2.sort(key=lambda player: ratings[player])
+        team_2_ratings = [ratings[player] for player in team_2]
+
+        best = None
+        for i, player in enumerate(team_1):
+            target = ratings[player] - difference / 2
+            position = bisect.bisect_left(team_2_ratings, target)
+            for j in (position - 1, position):
+                if 0 <= j < len(team_2):
+                    new_difference = difference + 2 * (team_2_ratings[j] - ratings[player])
+                    if best is None or abs(new_difference) < abs(best[0]):
+                        best = (new_difference, i, j)
+
+        if best is None or abs(best[0]) >= abs(difference):
+            return
+
+        difference, i, j = best
+        team_1[i], team_2[j] = team_2[j], team_1[i]